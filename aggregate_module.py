@@ -0,0 +1,126 @@
+from array import array
+from core_module import ingredient_key
+
+# =====================================================
+# Ingredient Aggregator
+# -----------------------------------------------------
+# Keeps every recipe's ingredients in two contiguous
+# columns: key_col (interned "name (unit)" id) and
+# qty_col (quantity). Each recipe owns one slice of the
+# columns, looked up by recipe id in spans.
+#
+# Edited or deleted recipes leave a dead slice behind;
+# the columns are rebuilt once dead rows outnumber the
+# live ones.
+#
+# For the Shopping page it also keeps running totals of
+# the selected recipes. select() / deselect() add or
+# subtract one recipe's slice and call on_change(keys)
+# with just the keys whose total changed.
+#
+# There is no whole-selection merge: a vectorized
+# group-by (np.unique / np.bincount over the columns)
+# was dropped once ticking kept these running totals,
+# since nothing called it. A tick costs one slice.
+# =====================================================
+class IngredientAggregator:
+    def __init__(self, repo):
+        self.key_names = []     # key id -> "name (unit)"
+        self.key_ids = {}       # "name (unit)" -> key id
+        self.key_col = array("i")
+        self.qty_col = array("d")
+        self.spans = {}         # recipe id -> (start, end)
+        self.dead = 0
+
+        self.selected = set()   # recipe ids in the running totals
+        self.totals = {}        # "name (unit)" -> total qty of the selected recipes
+        self.counts = {}        # "name (unit)" -> ingredient rows adding to it
+        self.on_change = None
+
+        for rid, recipe in repo.items():
+            self.add_recipe(rid, recipe)
+        repo.subscribe(self.on_repo_change)
+
+    # ================== Interning ====================
+    def intern(self, key):
+        kid = self.key_ids.get(key)
+        if kid is None:
+            kid = len(self.key_names)
+            self.key_ids[key] = kid
+            self.key_names.append(key)
+        return kid
+
+    # ================== Columns ====================
+    def add_recipe(self, rid, recipe):
+        start = len(self.key_col)
+        for ing in recipe.get("ingredients", []):
+            try: qty = float(ing.get("qty", 0))
+            except Exception: qty = 0.0
+            self.key_col.append(self.intern(ingredient_key(ing)))
+            self.qty_col.append(qty)
+        self.spans[rid] = (start, len(self.key_col))
+
+    def remove_recipe(self, rid):
+        span = self.spans.pop(rid, None)
+        if span is None:
+            return
+        self.dead += span[1] - span[0]
+        if self.dead > len(self.key_col) // 2:
+            self.compact()
+
+    def compact(self):
+        key_col, qty_col = array("i"), array("d")
+        for rid, (start, end) in self.spans.items():
+            self.spans[rid] = (len(key_col), len(key_col) + end - start)
+            key_col.extend(self.key_col[start:end])
+            qty_col.extend(self.qty_col[start:end])
+        self.key_col, self.qty_col, self.dead = key_col, qty_col, 0
+
+    def on_repo_change(self, event, rid, recipe):
+        selected = rid in self.selected
+        changed = self.apply_slice(rid, -1) if selected else set()
+
+        self.remove_recipe(rid)
+        if event != "delete":
+            self.add_recipe(rid, recipe)
+            if selected:
+                changed |= self.apply_slice(rid, 1)
+        else:
+            self.selected.discard(rid)
+
+        self.notify(changed)
+
+    # ================== Running Totals ====================
+    def select(self, rid):
+        if rid in self.selected or rid not in self.spans:
+            return
+        self.selected.add(rid)
+        self.notify(self.apply_slice(rid, 1))
+
+    def deselect(self, rid):
+        if rid not in self.selected:
+            return
+        changed = self.apply_slice(rid, -1)
+        self.selected.discard(rid)
+        self.notify(changed)
+
+    # add (sign 1) or subtract (sign -1) one recipe, returns the changed keys
+    def apply_slice(self, rid, sign):
+        start, end = self.spans[rid]
+        changed = set()
+        for i in range(start, end):
+            key = self.key_names[self.key_col[i]]
+            count = self.counts.get(key, 0) + sign
+            if count <= 0:
+                self.counts.pop(key, None)
+                self.totals.pop(key, None)
+            else:
+                self.counts[key] = count
+                # rounded so adding and removing does not leave float dust behind
+                self.totals[key] = round(self.totals.get(key, 0) + sign * self.qty_col[i], 9)
+            changed.add(key)
+        return changed
+
+    def notify(self, changed):
+        if changed and self.on_change:
+            self.on_change(changed)
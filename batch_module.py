@@ -0,0 +1,79 @@
+import argparse, json, os, sys, time
+from multiprocessing import Pool
+from core_module import Catalog
+from store_module import RECIPE_FILE
+
+# =====================================================
+# Batch Meal Plans (command line, no window)
+# -----------------------------------------------------
+#   python batch_module.py plans.txt -o results.jsonl
+#
+# plans.txt has one meal plan per line: recipe names
+# separated by ";" (like the Recipes page fields) or a
+# JSON list of names. Each plan gives one JSON line with
+# its calorie total and merged shopping list.
+#
+# Plans are spread over a process pool. Every worker
+# loads the catalog once when it starts (read only; it
+# maps recipes.json.snap when the app has left a fresh
+# one) and then gets plans in chunks.
+# =====================================================
+CHUNK = 64
+
+catalog = None  # the worker's Catalog
+
+def init_worker(recipe_file):
+    global catalog
+    catalog = Catalog.load(recipe_file)
+
+def run_plan(item):
+    number, names = item
+    result = catalog.meal_plan(names)
+    result["plan"] = number
+    return result
+
+def read_plans(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("["):
+                yield json.loads(line)
+            else:
+                yield [name.strip() for name in line.split(";") if name.strip()]
+
+def write_results(results, out):
+    count = 0
+    for result in results:
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shopping lists and calorie totals for many meal plans.")
+    parser.add_argument("plans", help="file with one meal plan per line (names separated by ';' or a JSON list)")
+    parser.add_argument("-r", "--recipes", default=RECIPE_FILE, help="recipe catalog (default: %(default)s)")
+    parser.add_argument("-o", "--output", help="write JSON lines here instead of to stdout")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    plans = enumerate(read_plans(args.plans), 1)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.workers <= 1:
+            init_worker(args.recipes)
+            count = write_results(map(run_plan, plans), out)
+        else:
+            with Pool(args.workers, initializer=init_worker, initargs=(args.recipes,)) as pool:
+                count = write_results(pool.imap(run_plan, plans, chunksize=CHUNK), out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"{count} plans in {time.perf_counter() - start:.2f} s ({max(1, args.workers)} workers)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import argparse, json, os, platform, random, shutil, statistics, sys, tempfile, time
+from storage_module import RecipeStorage, write_json_atomic
+from repository_module import SubstituteRepository
+from graph_module import SubstitutionGraph
+from aggregate_module import IngredientAggregator
+from search_module import RecipeSearchIndex
+from nutrition_module import NutritionIndex
+from planner_module import MealPlanner
+from core_module import lookup_substitutes
+from model_module import as_dict
+
+# =====================================================
+# Benchmarks (command line)
+# -----------------------------------------------------
+#   python bench_module.py                  1k, 10k, 100k
+#   python bench_module.py --sizes 1m --check
+#   xvfb-run python bench_module.py         + Recipes page
+#
+# Writes a synthetic recipes.json / substitutes.json of
+# each size (same seed -> same files), times the hot
+# paths on them and saves the timings (ms, median of a
+# few runs) to bench_results.json.
+#
+# The Recipes page timings need a real Tk window; with
+# no display (and no Xvfb) they are listed as skipped.
+#
+# --check compares the run with bench_thresholds.json
+# and exits with 1 if any timing is over its limit.
+# The limits are about 3x the timings measured when
+# they were set (5 ms at least, 50 ms for one fsynced
+# save), so only a real slowdown trips them; raise or
+# lower them in the same change that moves a timing.
+# Cases without a limit (the page timings until they
+# are measured under Xvfb) are recorded, not checked.
+#
+# 1m needs about 4.5 GB of memory.
+# =====================================================
+SIZES = {"1k": 1000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_SIZES = ("1k", "10k", "100k")
+SEED = 2024
+RESULTS_FILE = "bench_results.json"
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_thresholds.json")
+
+WORDS = ("chicken", "rice", "egg", "tomato", "onion", "garlic", "beef", "pork", "tofu", "noodle",
+         "potato", "carrot", "pepper", "cheese", "milk", "butter", "flour", "sugar", "salt", "lemon",
+         "basil", "ginger", "mushroom", "spinach", "corn", "bean", "fish", "prawn", "coconut", "curry")
+UNITS = ("g", "ml", "pcs", "tbsp", "tsp", "cup")
+CATEGORIES = ("Dairy", "Meat", "Vegetables", "Grains", "Spices", "Fruit", "Oils", "Others")
+
+# ================== Synthetic Data ====================
+def ingredient_names(count):
+    return [f"{WORDS[i % len(WORDS)]} {i // len(WORDS)}" for i in range(count)]
+
+# Generators, so a million records never sit in memory at once
+def make_recipes(n, seed=SEED):
+    rng = random.Random(seed)
+    names = ingredient_names(max(100, n // 20))
+    for i in range(n):
+        ingredients = [{"name": name, "qty": float(rng.randint(1, 500)), "unit": rng.choice(UNITS), "kcal": float(rng.randint(5, 400))}
+                       for name in rng.sample(names, rng.randint(2, 8))]
+        yield {"name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+               "ingredients": ingredients,
+               "total_cal": sum(ing["kcal"] for ing in ingredients)}
+
+# (name, entry); most substitutes are plain names, about a third are
+# other entries, so there are multi-step chains for the graph
+def make_substitutes(n, seed=SEED):
+    rng = random.Random(seed + 1)
+    names = ingredient_names(n)
+    for name in names:
+        listed = [f"alt {name} {k}" for k in range(rng.randint(1, 3))]
+        if rng.random() < 0.35:
+            listed.append(names[rng.randrange(n)])
+        yield name, {"category": rng.choice(CATEGORIES), "subs": [s for s in listed if s != name]}
+
+def generate(folder, label, seed=SEED):
+    n = SIZES[label]
+    recipe_file = os.path.join(folder, f"recipes-{label}.json")
+    sub_file = os.path.join(folder, f"substitutes-{label}.json")
+    write_json_atomic(recipe_file, make_recipes(n, seed))
+    with open(sub_file, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        f.write(",\n".join(f"{json.dumps(name, ensure_ascii=False)}: {json.dumps(entry, ensure_ascii=False)}"
+                           for name, entry in make_substitutes(n, seed)))
+        f.write("\n}\n")
+    return recipe_file, sub_file
+
+# ================== Timing ====================
+# (median ms over repeat runs, result of the last run)
+def timed(fn, repeat=1):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 3), result
+
+def bench_storage(recipe_file, rng, out):
+    # first start after recipes.json changed: JSON parse + snapshot write
+    out["load_recipes_cold"], _ = timed(lambda: RecipeStorage(recipe_file).load(background_snapshot=False))
+    storage = RecipeStorage(recipe_file)
+    out["load_recipes"], repo = timed(storage.load)
+
+    ids = repo.ids()
+    names = [repo.get(rid)["name"] for rid in rng.sample(ids, min(500, len(ids)))]
+    names += [f"Missing recipe {i}" for i in range(1000 - len(names))]
+    out["add_recipe_duplicate_check_x1000"], _ = timed(lambda: [name in repo for name in names], repeat=5)
+
+    recipe = as_dict(repo.get(ids[0]))
+    change = {"op": "update", "name": recipe["name"], "recipe": recipe}
+    out["save_recipe"], _ = timed(lambda: storage.append(change), repeat=20)
+    out["save_recipes"], _ = timed(storage.compact)
+    return repo
+
+# One function per index, so each is freed before the next is built
+def bench_indexes(repo, rng, out):
+    bench_shopping(repo, rng, out)
+    bench_search(repo, rng, out)
+    bench_nutrition(repo, out)
+
+def bench_shopping(repo, rng, out):
+    out["shopping_index_build"], aggregator = timed(lambda: IngredientAggregator(repo))
+    selection = rng.sample(repo.ids(), min(20, len(repo)))
+    # the path ShoppingPage.toggle_recipe takes: running totals plus the changed keys
+    changed = []
+    aggregator.on_change = changed.append
+
+    def tick():
+        for rid in selection:
+            aggregator.select(rid)
+        for rid in selection:
+            aggregator.deselect(rid)
+    out["tick_recipe_x20"], _ = timed(tick, repeat=5)
+
+def bench_search(repo, rng, out):
+    out["recipe_search_index_build"], index = timed(lambda: RecipeSearchIndex(repo))
+    queries = [rng.choice(WORDS)[:3] for _ in range(100)]
+    out["recipe_search_x100"], _ = timed(lambda: [index.search(q) for q in queries], repeat=3)
+
+def bench_nutrition(repo, out):
+    out["nutrition_index_build"], nutrition = timed(lambda: NutritionIndex(repo))
+    out["calorie_range_x100"], _ = timed(lambda: [nutrition.in_range(lo, lo + 100) for lo in range(0, 2000, 20)], repeat=3)
+    # the plan search stops at planner_module.BUDGET_MS, so big catalogs sit at about that
+    out["meal_planner_build"], planner = timed(lambda: MealPlanner(repo, nutrition))
+    out["meal_plan_day"], _ = timed(lambda: planner.plan(3, 1800, 2200), repeat=3)
+    out["meal_plan_week"], _ = timed(lambda: planner.plan(21, 14000, 15000))
+
+def bench_substitutes(sub_file, rng, out):
+    def load():
+        with open(sub_file, "r", encoding="utf-8") as f:
+            return SubstituteRepository(json.load(f))
+    out["load_substitutes"], subs = timed(load)
+    graph = SubstitutionGraph(subs)     # no path: always built, never read from the cache
+    out["substitute_graph_build"], _ = timed(graph.build)
+    queries = rng.sample(subs.names(), min(1000, len(subs)))
+    out["find_substitute_x1000"], _ = timed(lambda: [lookup_substitutes(subs, graph, q) for q in queries], repeat=3)
+
+# The Recipes page on a hidden Tk root; returns the reason if it cannot run
+def bench_pages(recipe_file, sub_file, rng, out):
+    try:
+        import tkinter as tk
+        from recipe_module import RecipesPage
+        from store_module import DataStore
+        root = tk.Tk()
+    except (ImportError, RuntimeError) as e:
+        return f"no Tk ({e}), run under xvfb-run"
+    except Exception as e:     # TclError: no display
+        return f"no display ({e}), run under xvfb-run"
+
+    try:
+        root.withdraw()
+        store = DataStore(recipe_file, sub_file)    # no widget given: loads in the foreground
+        out["recipes_page_build"], page = timed(lambda: RecipesPage(root, store))
+        out["refresh_recipe_list"], _ = timed(page.refresh_recipe_list, repeat=5)
+
+        page.search_query = rng.choice(WORDS)[:3]
+        page.refresh_recipe_list()      # builds the search index
+        out["refresh_recipe_list_search"], _ = timed(page.refresh_recipe_list, repeat=5)
+
+        page.search_query = ""
+        page.cal_filter = (200.0, 600.0, "All")
+        page.refresh_recipe_list()      # builds the calorie index
+        out["refresh_recipe_list_calories"], _ = timed(page.refresh_recipe_list, repeat=5)
+    finally:
+        root.destroy()
+    return None
+
+def run_size(label, seed, with_pages=True):
+    rng = random.Random(seed)
+    folder = tempfile.mkdtemp(prefix=f"recipe-bench-{label}-")
+    timings, skipped = {}, []
+    try:
+        recipe_file, sub_file = generate(folder, label, seed)
+        repo = bench_storage(recipe_file, rng, timings)
+        bench_indexes(repo, rng, timings)
+        del repo
+        bench_substitutes(sub_file, rng, timings)
+        reason = bench_pages(recipe_file, sub_file, rng, timings) if with_pages else "--no-pages"
+        if reason:
+            skipped.append({"cases": "Recipes page", "reason": reason})
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return {"records": SIZES[label], "timings_ms": timings, "skipped": skipped}
+
+# ================== Thresholds ====================
+# [(size, case, ms, limit), ...] for every timing over its limit
+def regressions(results, thresholds):
+    over = []
+    for label, run in results["sizes"].items():
+        limits = thresholds.get(label, {})
+        for case, ms in run["timings_ms"].items():
+            if case in limits and ms > limits[case]:
+                over.append((label, case, ms, limits[case]))
+    return over
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the recipe app's hot paths on synthetic catalogs.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(DEFAULT_SIZES), help="catalog sizes (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=SEED, help="generator seed (default: %(default)s)")
+    parser.add_argument("-o", "--output", default=RESULTS_FILE, help="results file (default: %(default)s)")
+    parser.add_argument("--check", action="store_true", help="exit with 1 if a timing is over bench_thresholds.json")
+    parser.add_argument("--thresholds", default=THRESHOLDS_FILE, help=argparse.SUPPRESS)
+    parser.add_argument("--no-pages", action="store_true", help="skip the Tk page timings")
+    parser.add_argument("--generate", metavar="FOLDER", help="only write the synthetic JSON files to FOLDER")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        os.makedirs(args.generate, exist_ok=True)
+        for label in args.sizes:
+            print(*generate(args.generate, label, args.seed))
+        return
+
+    results = {"seed": args.seed,
+               "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+               "python": platform.python_version(),
+               "platform": platform.platform(),
+               "sizes": {}}
+    for label in args.sizes:
+        print(f"{label}...", file=sys.stderr)
+        run = results["sizes"][label] = run_size(label, args.seed, not args.no_pages)
+        for case, ms in run["timings_ms"].items():
+            print(f"  {case:34} {ms:10.3f} ms", file=sys.stderr)
+        for skip in run["skipped"]:
+            print(f"  skipped {skip['cases']}: {skip['reason']}", file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    if args.check:
+        with open(args.thresholds, "r", encoding="utf-8") as f:
+            over = regressions(results, json.load(f))
+        for label, case, ms, limit in over:
+            print(f"SLOWER {label} {case}: {ms:.3f} ms (limit {limit} ms)", file=sys.stderr)
+        if over:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import re
+from storage_module import RecipeStorage
+
+# =====================================================
+# Core (no Tk)
+# -----------------------------------------------------
+# The recipe logic the pages use, without any widgets,
+# so it also runs from scripts and the batch tool
+# (batch_module.py): parsing what the user typed,
+# merging ingredients into a shopping list, calorie
+# totals and substitute lookups.
+# =====================================================
+QTY_PATTERN = re.compile(r"^\s*([\d.]+)\s*\((.*?)\)\s*$")
+
+def split_field(raw):
+    return [part.strip() for part in raw.split(";") if part.strip()]
+
+# ================== Parsing ====================
+# "egg ; rice", "2(pcs) ; 200(g)", "70 ; 300" -> ({"ingredients", "total"}, None)
+# or (None, error message)
+#
+# With a nutrients table (see nutrient_module) a calorie of "auto",
+# or an empty calories field, is looked up from name, qty and unit.
+# loading: the table is still being built (DataStore.nutrients is None)
+AUTO = "auto"
+
+def is_auto(cal):
+    return cal is None or (isinstance(cal, str) and cal.strip().lower() in ("", AUTO))
+
+def parse_ingredients(ing_raw, qty_raw, cal_raw, nutrients=None, loading=False):
+    names, qtys, cals = split_field(ing_raw), split_field(qty_raw), split_field(cal_raw)
+    if not names:
+        return None, "Please enter at least one ingredient"
+    if not cals:
+        cals = [AUTO] * len(names)
+
+    if not (len(names) == len(qtys) == len(cals)):
+        return None, "Ingredient count mismatch"
+
+    ingredients = []
+    total = 0
+
+    for name, qty_str, cal_str in zip(names, qtys, cals):
+        match = QTY_PATTERN.match(qty_str)
+        try:
+            qty = float(match.group(1))
+        except (AttributeError, ValueError):
+            return None, f"Invalid quantity format: {qty_str}"
+        unit = match.group(2)
+
+        if is_auto(cal_str):
+            if nutrients is None:
+                if loading:
+                    return None, "The nutrient table is still loading, type the calories or try again in a moment"
+                return None, "No nutrient table (nutrients.csv), please type the calories"
+            kcal = lookup_calories(nutrients, name, qty, unit)
+            if kcal is None:
+                return None, f"Unknown calories for {name} ({unit}), please type them"
+        else:
+            try:
+                kcal = float(cal_str)
+            except ValueError:
+                return None, f"Invalid calorie: {cal_str}"
+
+        ingredients.append({"name": name, "qty": qty, "unit": unit, "kcal": kcal})
+        total += kcal
+
+    return {"ingredients": ingredients, "total": total}, None
+
+def lookup_calories(nutrients, name, qty, unit):
+    return None if nutrients is None else nutrients.kcal(name, qty, unit)
+
+# ================== Shopping List ====================
+def ingredient_key(ing):
+    name, unit = ing.get("name", "").strip(), ing.get("unit", "").strip()
+    return f"{name} ({unit})"
+
+# {"name (unit)": total qty} over the given recipes
+def merge_ingredients(recipes):
+    totals = {}
+    for recipe in recipes:
+        for ing in recipe.get("ingredients", []):
+            try: qty = float(ing.get("qty", 0))
+            except (TypeError, ValueError): qty = 0.0
+            key = ingredient_key(ing)
+            totals[key] = totals.get(key, 0) + qty
+    # rounded so sums like 0.1 + 0.2 print as 0.3
+    return {key: round(qty, 9) for key, qty in totals.items()}
+
+def total_calories(recipes):
+    total = 0.0
+    for recipe in recipes:
+        try: total += float(recipe.get("total_cal", 0))
+        except (TypeError, ValueError): pass
+    return round(total, 9)
+
+# ================== Substitutes ====================
+# What the Substitutes page shows for ing, None if nothing is known:
+# {"direct": [names], "further": [(name, hops, via)], "replaces": [(name, hops, via)]}
+def lookup_substitutes(subs, graph, ing):
+    replaces = graph.replaces(ing)
+    if ing not in subs and not replaces:
+        return None
+    return {"direct": subs.substitutes_for(ing) if ing in subs else [],
+            "further": [r for r in graph.replacements(ing) if r[1] > 1],
+            "replaces": replaces}
+
+# =====================================================
+# Catalog
+# -----------------------------------------------------
+# A loaded recipes.json (through the same storage as the
+# app, so the snapshot and journal are used) plus the
+# meal-plan query the batch tool runs. Loading is read
+# only (RecipeStorage.read), so running it next to the
+# app never changes the app's files.
+# =====================================================
+class Catalog:
+    def __init__(self, repo):
+        self.repo = repo
+
+    @classmethod
+    def load(cls, recipe_file):
+        return cls(RecipeStorage(recipe_file).read())
+
+    # names: recipe names of one meal plan (a name may repeat)
+    def meal_plan(self, names):
+        recipes, unknown = [], []
+        for name in names:
+            recipe = self.repo.get_by_name(name)
+            if recipe is None:
+                unknown.append(name)
+            else:
+                recipes.append(recipe)
+        return {"recipes": [r["name"] for r in recipes],
+                "unknown": unknown,
+                "total_cal": total_calories(recipes),
+                "shopping_list": merge_ingredients(recipes)}
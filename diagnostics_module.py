@@ -0,0 +1,294 @@
+import bisect, json, os, sys, threading, time
+import tkinter as tk
+from tkinter import messagebox, filedialog
+
+# =====================================================
+# Diagnostics (opt-in: RECIPE_APP_PROFILE=1)
+# -----------------------------------------------------
+# Times the page handlers and store operations listed
+# in TIMED and keeps a latency histogram per operation,
+# plus a stall watch on the Tk mainloop: an after()
+# tick every TICK_MS that notes how late it ran. A tick
+# more than STALL_MS late is a stall, logged with the
+# last timed handler that finished before it.
+#
+# Nothing is wrapped unless the variable is set, so a
+# normal run has no extra cost. When it is, ImportWatch
+# wraps each TIMED class as soon as its module is
+# imported, also the indexes the store imports on first
+# use. When it is set, main.App
+# adds a Diagnostics menu item (live table, Export) and
+# writes EXPORT_FILE when the window closes.
+#
+# Time spent waiting in a message box or file dialog is
+# not counted: it is the user, not the handler.
+# =====================================================
+ENABLED = os.environ.get("RECIPE_APP_PROFILE") == "1"
+EXPORT_FILE = "recipe_app_profile.json"
+TICK_MS = 50
+STALL_MS = 200
+MAX_STALLS = 500
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# "module.Class": methods to time
+TIMED = {
+    "recipe_module.RecipesPage": ("on_add_or_save", "view_recipe", "delete_recipe", "start_edit", "refresh_recipe_list",
+                                  "run_search", "apply_cal_filter", "on_repo_change", "on_import_done",
+                                  "update_cal_preview"),
+    "substitute_module.SubstitutePage": ("find_substitute", "show_substitutes", "update_suggestions"),
+    "shopping_module.ShoppingPage": ("select_recipes", "toggle_recipe", "update_ingredient_rows", "generate_missing", "on_repo_change",
+                                     "plan_meals"),
+    "pantry_module.PantryPage": ("find_recipes",),
+    "store_module.DataStore": ("add_recipe", "add_recipes", "update_recipe", "delete_recipe", "on_load_message", "load_substitutes"),
+    "storage_module.RecipeStorage": ("load", "append", "compact"),
+    "graph_module.SubstitutionGraph": ("build",),
+    "search_module.RecipeSearchIndex": ("search",),
+    "nutrition_module.NutritionIndex": ("in_range", "lowest", "highest"),
+    "pantry_index_module.PantryIndex": ("query",),
+    "planner_module.MealPlanner": ("plan",),
+}
+DIALOGS = ((messagebox, ("showinfo", "showwarning", "showerror", "askyesno", "askokcancel")),
+           (filedialog, ("askopenfilename", "asksaveasfilename")))
+
+# =====================================================
+# Histogram: counts per bucket (upper bounds in ms)
+# =====================================================
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    # Upper bound of the bucket the p-th percentile falls in
+    def percentile(self, p):
+        rank, seen = p / 100 * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return round(min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max, 3)
+        return 0.0
+
+    def as_dict(self):
+        return {"count": self.count,
+                "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+                "p50_ms": self.percentile(50), "p90_ms": self.percentile(90), "p99_ms": self.percentile(99),
+                "max_ms": round(self.max, 3),
+                "buckets_ms": {f"<={b}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}": n
+                               for i, (b, n) in enumerate(zip(BUCKETS_MS + (None,), self.counts)) if n}}
+
+# =====================================================
+# Profiler
+# =====================================================
+class Profiler:
+    def __init__(self):
+        self.histograms = {}
+        self.stalls = []        # (seconds since start, ms, last handler)
+        self.lock = threading.Lock()    # the writer thread records too
+        self.started = time.perf_counter()
+        self.last = None        # last timed handler finished on the Tk thread
+        self.waiting = 0.0      # seconds spent in dialogs (Tk thread)
+        self.done = set()       # classes already wrapped
+
+    def record(self, name, ms):
+        with self.lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.add(ms)
+
+    def timed(self, name, fn):
+        def wrapper(*args, **kwargs):
+            main = threading.current_thread() is threading.main_thread()
+            waited = self.waiting
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                if main:
+                    elapsed -= self.waiting - waited
+                    self.last = name
+                self.record(name, elapsed * 1000)
+        wrapper.__name__ = fn.__name__
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    def dialog(self, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.waiting += time.perf_counter() - start
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    # Wraps the TIMED methods of every listed class whose module is loaded
+    def instrument_loaded(self):
+        for path, names in TIMED.items():
+            module_name, class_name = path.rsplit(".", 1)
+            module = sys.modules.get(module_name)
+            cls = getattr(module, class_name, None)
+            if cls is None or cls in self.done:
+                continue
+            for name in names:
+                fn = cls.__dict__.get(name)
+                if callable(fn):
+                    setattr(cls, name, self.timed(f"{class_name}.{name}", fn))
+            self.done.add(cls)
+
+    def stall(self, ms):
+        with self.lock:
+            if len(self.stalls) < MAX_STALLS:
+                self.stalls.append((round(time.perf_counter() - self.started, 3), round(ms, 1), self.last))
+
+    # ================== Export ====================
+    def report(self):
+        with self.lock:
+            return {"seconds": round(time.perf_counter() - self.started, 1),
+                    "stall_ms": STALL_MS,
+                    "operations": {name: hist.as_dict() for name, hist in sorted(self.histograms.items())},
+                    "stalls": [{"at_s": at, "ms": ms, "after": last} for at, ms, last in self.stalls]}
+
+    def export(self, path=EXPORT_FILE):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.stalls = []
+
+    def table(self):
+        report = self.report()
+        lines = [f"{'operation':40} {'count':>7} {'mean':>9} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>9}  (ms)"]
+        rows = sorted(report["operations"].items(), key=lambda item: -item[1]["mean_ms"] * item[1]["count"])
+        for name, h in rows:
+            lines.append(f"{name:40} {h['count']:7} {h['mean_ms']:9.2f} {h['p50_ms']:8} {h['p90_ms']:8} {h['p99_ms']:8} {h['max_ms']:9.1f}")
+        lines.append(f"\nMainloop stalls over {STALL_MS} ms: {len(report['stalls'])}")
+        for stall in report["stalls"][-15:]:
+            lines.append(f"  at {stall['at_s']:8.1f} s  {stall['ms']:8.1f} ms  after {stall['after'] or '-'}")
+        return "\n".join(lines)
+
+profiler = Profiler()
+
+# =====================================================
+# Mainloop stall watch
+# =====================================================
+class StallWatch:
+    def __init__(self, widget, profiler):
+        self.widget = widget
+        self.profiler = profiler
+        self.schedule()
+
+    def schedule(self):
+        self.due = time.perf_counter() + TICK_MS / 1000
+        self.waited = self.profiler.waiting
+        self.widget.after(TICK_MS, self.tick)
+
+    def tick(self):
+        late = (time.perf_counter() - self.due) * 1000
+        # a dialog was open: the wait was the user's
+        if self.profiler.waiting == self.waited:
+            self.profiler.record("mainloop lag", max(0.0, late))
+            if late > STALL_MS:
+                self.profiler.stall(late)
+        self.schedule()
+
+# =====================================================
+# Import watch
+# -----------------------------------------------------
+# A sys.meta_path finder that only answers for the TIMED
+# modules: it asks the other finders for the spec and
+# has the loader call instrument_loaded() once the
+# module has run.
+# =====================================================
+class ImportWatch:
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.modules = {path.rsplit(".", 1)[0] for path in TIMED}
+
+    def find_spec(self, name, path, target=None):
+        if name not in self.modules:
+            return None
+        for finder in sys.meta_path:
+            if finder is not self and hasattr(finder, "find_spec"):
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            exec_module = spec.loader.exec_module
+
+            def run(module):
+                exec_module(module)
+                self.profiler.instrument_loaded()
+            spec.loader.exec_module = run
+        return spec
+
+# Turns everything on for app (a Tk root); call before the store is created
+def start(app):
+    for module, names in DIALOGS:
+        for name in names:
+            setattr(module, name, profiler.dialog(getattr(module, name)))
+    profiler.instrument_loaded()
+    sys.meta_path.insert(0, ImportWatch(profiler))
+    return StallWatch(app, profiler)
+
+# =====================================================
+# Diagnostics window (live table, refreshed every second)
+# =====================================================
+REFRESH_MS = 1000
+
+class DiagnosticsWindow(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Diagnostics")
+        self.geometry("820x420")
+
+        self.text = tk.Text(self, font=("Consolas", 10), wrap="none")
+        self.text.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+
+        buttons = tk.Frame(self)
+        buttons.pack(pady=(0, 10))
+        tk.Button(buttons, text="Export", width=12, command=self.export).pack(side="left", padx=5)
+        tk.Button(buttons, text="Reset", width=12, command=self.reset).pack(side="left", padx=5)
+        tk.Button(buttons, text="Close", width=12, command=self.destroy).pack(side="left", padx=5)
+        self.job = None
+        self.refresh()
+
+    def refresh(self):
+        if self.job is not None:
+            self.after_cancel(self.job)
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("end", profiler.table())
+        self.text.config(state="disabled")
+        self.job = self.after(REFRESH_MS, self.refresh)
+
+    def destroy(self):
+        if self.job is not None:
+            self.after_cancel(self.job)
+            self.job = None
+        super().destroy()
+
+    def export(self):
+        try:
+            path = profiler.export()
+        except OSError as e:
+            return messagebox.showerror("Error", f"Could not write the report: {e}", parent=self)
+        messagebox.showinfo("Diagnostics", f"Saved to {os.path.abspath(path)}", parent=self)
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
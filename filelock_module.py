@@ -0,0 +1,86 @@
+import os, threading, time
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+# =====================================================
+# File Lock (between processes)
+# -----------------------------------------------------
+# Several app windows, on one PC or on terminals sharing
+# a folder, can point at the same recipes.json. Anything
+# that writes the journal or rewrites recipes.json does
+# it while holding this lock, so two writers never mix
+# their lines or fold the journal at the same time.
+#
+# The lock is a separate file (recipes.json.lock) locked
+# with flock on Linux/macOS and msvcrt.locking on
+# Windows; the OS drops it if the process dies. Threads
+# of one process also exclude each other.
+#
+#   with lock: ...                       waits
+#   if lock.acquire(timeout=0): ...      try once
+# =====================================================
+RETRY = 0.05
+
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.fd = None
+        self.depth = 0      # re-entry count of the owning thread
+
+    def acquire(self, timeout=None):
+        if not self.thread_lock.acquire(timeout=-1 if timeout is None else timeout):
+            return False
+        if self.depth:
+            self.depth += 1
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        while True:
+            try:
+                self.lock_file(fd, blocking=deadline is None)
+                break
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(fd)
+                    self.thread_lock.release()
+                    return False
+                time.sleep(RETRY)
+        self.fd, self.depth = fd, 1
+        return True
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            self.unlock_file(self.fd)
+            os.close(self.fd)
+            self.fd = None
+        self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    # ================== Platform ====================
+    @staticmethod
+    def lock_file(fd, blocking):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            # msvcrt has no waiting lock that never gives up, so blocking also polls
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+    @staticmethod
+    def unlock_file(fd):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
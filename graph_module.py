@@ -0,0 +1,119 @@
+import json, os
+from collections import deque
+from repository_module import name_key
+
+# =====================================================
+# Substitution Graph
+# -----------------------------------------------------
+# substitutes.json is really a graph: "mozzarella" can be
+# replaced by "cheddar cheese", which has substitutes of
+# its own. This builds the forward (X -> what can replace
+# X) and reverse (X -> what X can replace) adjacency once,
+# then runs a breadth-first search from every node up to
+# MAX_HOPS steps. Each answer is stored as a list of
+# (name, hops, via) sorted by hops, so lookups later are
+# a single dict access.
+#
+# The closure is cached in substitutes.json.graph next to
+# the JSON, tagged with the JSON's size and mtime; a stale
+# cache is ignored. Changes to the substitutes repository
+# drop the in-memory closure so it is rebuilt on next use.
+# =====================================================
+MAX_HOPS = 3
+
+class SubstitutionGraph:
+    def __init__(self, subs, path=None, max_hops=MAX_HOPS):
+        self.subs = subs
+        self.path = path
+        self.cache_path = None if path is None else path + ".graph"
+        self.max_hops = max_hops
+        self.forward = None     # name key -> [(name, hops, via), ...]
+        self.reverse = None
+        subs.subscribe(self.invalidate)
+
+    def invalidate(self, *event):
+        self.forward = self.reverse = None
+        # the file on disk no longer matches what is in memory
+        self.path = self.cache_path = None
+
+    # ================== Queries ====================
+    # What can replace ing (hops 1 = listed directly in substitutes.json)
+    def replacements(self, ing):
+        self.build()
+        return self.forward.get(name_key(ing), [])
+
+    # What ing can be used instead of
+    def replaces(self, ing):
+        self.build()
+        return self.reverse.get(name_key(ing), [])
+
+    # ================== Build ====================
+    def build(self):
+        if self.forward is not None:
+            return
+        if self.load_cache():
+            return
+
+        names, forward, reverse = {}, {}, {}
+        for ing in self.subs.names():
+            for sub in self.subs.substitutes_for(ing):
+                a, b = name_key(ing), name_key(sub)
+                names.setdefault(a, ing)
+                names.setdefault(b, sub)
+                forward.setdefault(a, []).append(b)
+                reverse.setdefault(b, []).append(a)
+
+        self.forward = {node: self.closure(node, forward, names) for node in forward}
+        self.reverse = {node: self.closure(node, reverse, names) for node in reverse}
+        self.save_cache()
+
+    def closure(self, start, edges, names):
+        found, seen = [], {start}
+        queue = deque([(start, 0, None)])
+        while queue:
+            node, hops, via = queue.popleft()
+            if hops == self.max_hops:
+                continue
+            for nxt in edges.get(node, ()):
+                if nxt in seen:
+                    continue
+                seen.add(nxt)
+                step_via = via if hops else None
+                found.append((names[nxt], hops + 1, step_via))
+                queue.append((nxt, hops + 1, step_via or names[nxt]))
+        return found
+
+    # ================== Disk Cache ====================
+    def stamp(self):
+        try:
+            st = os.stat(self.path)
+        except (OSError, TypeError):
+            return None
+        return [st.st_size, st.st_mtime_ns, self.max_hops]
+
+    def load_cache(self):
+        stamp = self.stamp()
+        if stamp is None or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if cache.get("stamp") != stamp:
+            return False
+        self.forward = {k: [tuple(x) for x in v] for k, v in cache["forward"].items()}
+        self.reverse = {k: [tuple(x) for x in v] for k, v in cache["reverse"].items()}
+        return True
+
+    def save_cache(self):
+        stamp = self.stamp()
+        if stamp is None:
+            return
+        try:
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"stamp": stamp, "forward": self.forward, "reverse": self.reverse}, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass    # the cache is only a speed-up
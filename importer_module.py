@@ -0,0 +1,200 @@
+import argparse, csv, json, os, sys, time
+from multiprocessing import Pool
+from core_module import is_auto, parse_ingredients, lookup_calories
+from nutrient_module import shared as shared_nutrients
+from repository_module import name_key
+from storage_module import RecipeStorage
+from store_module import RECIPE_FILE
+
+# =====================================================
+# Bulk Recipe Import (CSV / JSONL)
+# -----------------------------------------------------
+# CSV files have a header row with the four fields of
+# the Recipes page: name, ingredients, quantities,
+# calories (e.g. "Fried Rice", "egg ; rice",
+# "2(pcs) ; 200(g)", "70 ; 300").
+#
+# JSONL files have one JSON object per line, either
+# with those four fields or a whole recipe as stored in
+# recipes.json ({"name", "ingredients": [{"name", "qty",
+# "unit", "kcal"}, ...]}).
+#
+# Calories left empty (or "auto") are looked up in the
+# nutrient table when there is one (nutrient_module).
+#
+# Rows are read as a stream and checked by the same
+# core.parse_ingredients the page uses; from the command
+# line big files are parsed on a process pool. The app
+# parses in its loader thread instead: a pool started
+# from a Tk process forks its threads and locks on
+# Linux and re-imports main.py on Windows. Then dedupe() drops names
+# already in the catalog or seen earlier in the file,
+# and the caller adds what is left in one batch, so the
+# journal gets a single write. Every bad row ends up in
+# the error report (row, name, problem) instead of a
+# message box each.
+# =====================================================
+FIELDS = ("name", "ingredients", "quantities", "calories")
+PARALLEL_BYTES = 1 << 20   # smaller files are parsed in-process, a pool costs more to start
+CHUNK = 256
+BATCH = 500             # parsed rows per message for the background loader
+
+# ================== Reading ====================
+# Yields (row number, record, progress 0..1); a JSONL record is the raw line
+def read_rows(path):
+    size = max(1, os.path.getsize(path))
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".csv"):
+            read = [0]
+
+            def lines():
+                for line in f:
+                    read[0] += len(line)
+                    yield line
+
+            reader = csv.DictReader(lines())
+            reader.fieldnames = [(h or "").strip().lower() for h in reader.fieldnames or []]
+            missing = [h for h in FIELDS if h not in reader.fieldnames]
+            if missing:
+                raise ValueError(f"CSV header is missing: {', '.join(missing)}")
+            for record in reader:
+                yield reader.line_num, record, min(1.0, read[0] / size)
+        else:
+            read = 0
+            for number, line in enumerate(f, 1):
+                read += len(line)
+                if line.strip():
+                    yield number, line, min(1.0, read / size)
+
+# ================== Parsing ====================
+# (row, record, progress) -> (row, recipe or None, name, error or None, progress)
+def parse_row(item):
+    row, record, progress = item
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError:
+            return row, None, "", "Invalid JSON", progress
+        if not isinstance(record, dict):
+            return row, None, "", "Expected a JSON object", progress
+
+    name = record.get("name")
+    name = name.strip() if isinstance(name, str) else ""
+    if not name:
+        return row, None, "", "Missing recipe name", progress
+
+    if isinstance(record.get("ingredients"), list):
+        data, err = check_ingredients(record["ingredients"], shared_nutrients())
+    else:
+        fields = [record.get(field) or "" for field in FIELDS[1:]]
+        if not all(isinstance(field, str) for field in fields):
+            return row, None, name, "Fields must be text", progress
+        data, err = parse_ingredients(*fields, shared_nutrients())
+    if err:
+        return row, None, name, err, progress
+
+    recipe = {"name": name, "ingredients": data["ingredients"], "total_cal": data["total"]}
+    return row, recipe, name, None, progress
+
+# Same checks and result as parse_ingredients, for ingredients already split up
+def check_ingredients(ings, nutrients=None):
+    if not ings:
+        return None, "Please enter at least one ingredient"
+    ingredients, total = [], 0
+    for ing in ings:
+        if not isinstance(ing, dict) or not isinstance(ing.get("name"), str) or not ing["name"].strip():
+            return None, "Ingredient without a name"
+        unit = ing.get("unit", "")
+        if not isinstance(unit, str):
+            return None, f"Invalid unit: {ing['name']}"
+        kcal = ing.get("kcal")
+        try:
+            qty = float(ing.get("qty"))
+            if is_auto(kcal):
+                kcal = lookup_calories(nutrients, ing["name"].strip(), qty, unit.strip())
+                if kcal is None:
+                    return None, f"Unknown calories for {ing['name']} ({unit})"
+            kcal = float(kcal)
+        except (TypeError, ValueError):
+            return None, f"Invalid quantity or calorie: {ing['name']}"
+        ingredients.append({"name": ing["name"].strip(), "qty": qty, "unit": unit.strip(), "kcal": kcal})
+        total += kcal
+    return {"ingredients": ingredients, "total": total}, None
+
+# Parsed rows in file order, on a process pool when the file is big
+def parse_rows(path, workers=None):
+    workers = workers or os.cpu_count() or 1
+    rows = read_rows(path)
+    shared_nutrients()      # builds nutrients.db here once if needed, not in every worker
+    if workers <= 1 or os.path.getsize(path) < PARALLEL_BYTES:
+        yield from map(parse_row, rows)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(parse_row, rows, chunksize=CHUNK)
+
+# For BackgroundLoader: ("rows", [parsed row, ...], progress) messages,
+# parsed in the calling thread (no process pool inside the app)
+def parse_in_batches(path, workers=1):
+    batch = []
+    for result in parse_rows(path, workers):
+        batch.append(result)
+        if len(batch) == BATCH:
+            yield "rows", batch, result[-1]
+            batch = []
+    if batch:
+        yield "rows", batch, 1.0
+
+# ================== Dedupe + Report ====================
+# Splits parsed rows into recipes to add and [(row, name, problem), ...]
+def dedupe(parsed, repo):
+    recipes, errors, seen = [], [], {}
+    for row, recipe, name, err, _ in parsed:
+        if err is None:
+            key = name_key(name)
+            if repo.find(name) is not None:
+                err = "Recipe already exists"
+            elif key in seen:
+                err = f"Same name as row {seen[key]}"
+            else:
+                seen[key] = row
+                recipes.append(recipe)
+                continue
+        errors.append((row, name, err))
+    return recipes, errors
+
+def write_report(path, errors):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["row", "name", "problem"])
+        writer.writerows(errors)
+
+def report_path(path):
+    return os.path.splitext(path)[0] + ".errors.csv"
+
+# =====================================================
+# Command line: python importer_module.py recipes.csv
+# =====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import recipes from a CSV or JSONL file.")
+    parser.add_argument("file", help="CSV (name, ingredients, quantities, calories) or JSONL file")
+    parser.add_argument("-r", "--recipes", default=RECIPE_FILE, help="recipe catalog (default: %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    storage = RecipeStorage(args.recipes)
+    storage.load()
+    if storage.orphaned:
+        print(f"{args.recipes} was changed outside the app, the changes saved on top of the old file are in {storage.orphaned}", file=sys.stderr)
+    recipes, errors = dedupe(parse_rows(args.file, args.workers), storage.repo)
+    if recipes:
+        storage.append(*[{"op": "add", "recipe": recipe} for recipe in recipes])
+    storage.close()
+
+    print(f"Imported {len(recipes)} recipes in {time.perf_counter() - start:.2f} s.")
+    if errors:
+        write_report(report_path(args.file), errors)
+        print(f"{len(errors)} rows skipped, see {report_path(args.file)}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
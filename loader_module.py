@@ -0,0 +1,126 @@
+import json, os, queue, threading, time
+
+# =====================================================
+# JSON Array Reader
+# -----------------------------------------------------
+# Reads a file holding one big JSON array (recipes.json)
+# item by item, a chunk of text at a time, instead of
+# json.load-ing the whole thing. progress is the share
+# of the file read so far (0..1).
+#
+# An item cut off by the end of the buffer is decoded
+# again once the next chunk is added. A malformed or
+# unterminated item would repeat that up to the end of
+# the file, so an item still not decoded after
+# max_item_chars raises ValueError instead.
+# =====================================================
+CHUNK_CHARS = 1 << 20
+MAX_ITEM_CHARS = 1 << 24
+WHITESPACE = " \t\r\n"
+
+class JsonArrayReader:
+    def __init__(self, f, chunk_chars=CHUNK_CHARS, max_item_chars=MAX_ITEM_CHARS):
+        self.f = f
+        self.chunk_chars = chunk_chars
+        self.max_item_chars = max_item_chars
+        self.size = max(1, os.fstat(f.fileno()).st_size)
+        self.read_chars = 0
+        self.progress = 0.0
+
+    def read_more(self, buf, pos):
+        if len(buf) - pos > self.max_item_chars:
+            start = self.read_chars - len(buf) + pos
+            raise ValueError(f"Item at character {start} is not valid JSON (or longer than {self.max_item_chars} characters)")
+        chunk = self.f.read(self.chunk_chars)
+        self.read_chars += len(chunk)
+        self.progress = min(1.0, self.read_chars / self.size)
+        return buf[pos:] + chunk, 0, chunk == ""
+
+    def __iter__(self):
+        decoder = json.JSONDecoder()
+        buf, pos, eof = self.read_more("", 0)
+
+        # opening bracket
+        while True:
+            while pos < len(buf) and buf[pos] in WHITESPACE:
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            buf, pos, eof = self.read_more(buf, pos)
+        if pos == len(buf) or buf[pos] != "[":
+            raise ValueError("Expected a JSON array")
+        pos += 1
+
+        while True:
+            while pos < len(buf) and buf[pos] in WHITESPACE + ",":
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    raise ValueError("Unexpected end of JSON array")
+                buf, pos, eof = self.read_more(buf, pos)
+                continue
+            if buf[pos] == "]":
+                self.progress = 1.0
+                return
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                buf, pos, eof = self.read_more(buf, pos)
+                continue
+            # an item running up to the end of the buffer may be cut short
+            if end == len(buf) and not eof:
+                buf, pos, eof = self.read_more(buf, pos)
+                continue
+            yield item
+            pos = end
+
+# =====================================================
+# Background Loader
+# -----------------------------------------------------
+# Runs a generator of (kind, data, progress) messages on
+# a worker thread and hands them to the Tk thread through
+# a queue picked up with after(). Each poll handles
+# messages for at most BUDGET_MS so the window keeps
+# responding while a big catalog streams in.
+#
+#   on_message(kind, data, progress)  on the Tk thread
+#   on_done(error)                    error is None if it worked
+# =====================================================
+POLL_MS = 30
+BUDGET_MS = 15
+
+class BackgroundLoader:
+    def __init__(self, widget, messages, on_message, on_done):
+        self.widget = widget
+        self.messages = messages
+        self.on_message = on_message
+        self.on_done = on_done
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="recipe-loader", daemon=True)
+        self.thread.start()
+        self.widget.after(POLL_MS, self.poll)
+
+    def run(self):
+        try:
+            for message in self.messages:
+                self.results.put(message)
+            self.results.put(("done", None, 1.0))
+        except Exception as e:
+            self.results.put(("error", e, 1.0))
+
+    def poll(self):
+        deadline = time.perf_counter() + BUDGET_MS / 1000
+        while time.perf_counter() < deadline:
+            try:
+                kind, data, progress = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "done":
+                return self.on_done(None)
+            if kind == "error":
+                return self.on_done(data)
+            self.on_message(kind, data, progress)
+        self.widget.after(POLL_MS, self.poll)
@@ -1,8 +1,11 @@
+import time
+START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
-from recipe_module import RecipesPage
-from substitute_module import SubstitutePage
-from shopping_module import ShoppingPage
+import importlib, os
+import diagnostics_module as diagnostics
+from store_module import DataStore
 
 MENU_BG = "#D6E3F5"
 MENU_TITLE_BG = "#87A7ED"
@@ -10,6 +13,15 @@ PRIMARY = "#6F82EF"
 HOVER_BG = "#D1DAE8"
 BG_LIGHT = "#F7F9FC"
 
+# Pages are imported and built the first time they are shown; the PREFETCH ones also while
+# idle (see prefetch_pages). Shopping and Pantry index every recipe when they are built, which
+# takes seconds on a big catalog, so they wait until they are opened.
+PAGES = {"recipes": ("recipe_module", "RecipesPage"),"substitutes": ("substitute_module", "SubstitutePage"),"shopping": ("shopping_module", "ShoppingPage"),"pantry": ("pantry_module", "PantryPage")}
+PREFETCH = ("substitutes",)
+
+# set RECIPE_APP_TIMING=1 to print startup times
+SHOW_TIMING = os.environ.get("RECIPE_APP_TIMING") == "1"
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -21,9 +33,30 @@ class App(tk.Tk):
         self.grid_columnconfigure(0, weight=1)
         self.main_frame = tk.Frame(self, bg=BG_LIGHT)
         self.main_frame.grid(row=0, column=0, sticky="nsew")
+
+        # RECIPE_APP_PROFILE=1: time handlers and watch for mainloop stalls
+        if diagnostics.ENABLED:
+            self.stall_watch = diagnostics.start(self)
+
+        # one shared data store for every page, JSON is parsed once here
+        self.store = DataStore()
+        self.store.start_writer(self, on_error=self.on_save_error, on_conflict=self.on_save_conflict)
+
         self.create_left_menu()
         self.create_right_pages()
+
+        # paint the window before any page or data is loaded
+        self.update_idletasks()
+        self.startup_ms = {"first_paint": (time.perf_counter() - START) * 1000}
         self.show_page("recipes")
+        self.update_idletasks()
+        self.startup_ms["recipes_ready"] = (time.perf_counter() - START) * 1000
+        if SHOW_TIMING:
+            print("Startup: " + ", ".join(f"{k} {v:.0f} ms" for k, v in self.startup_ms.items()))
+
+        if PREFETCH:
+            self.after_idle(self.prefetch_pages)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     # LEFT MENU 
     def create_left_menu(self):
@@ -37,6 +70,11 @@ class App(tk.Tk):
         self.create_menu_item("🍳 Recipes Manager", "recipes")
         self.create_menu_item("🔄 Ingredient", "substitutes")
         self.create_menu_item("🛒 Shopping List", "shopping")
+        self.create_menu_item("🥫 Pantry", "pantry")
+        if diagnostics.ENABLED:
+            lbl = tk.Label(self.menu_frame, text=" 📊 Diagnostics",font=("Segoe UI", 14, "bold"),fg="#2C3E50", bg=MENU_BG, anchor="w",cursor="hand2", padx=20, pady=15)
+            lbl.pack(fill="x", pady=3)
+            lbl.bind("<Button-1>", lambda e: diagnostics.DiagnosticsWindow(self))
 
     def create_menu_item(self, text, target_page):
         lbl = tk.Label(self.menu_frame, text=" " + text,font=("Segoe UI", 14, "bold"),fg="#2C3E50", bg=MENU_BG, anchor="w",cursor="hand2", padx=20, pady=15)
@@ -50,17 +88,47 @@ class App(tk.Tk):
         self.content = tk.Frame(self.main_frame, bg=BG_LIGHT)
         self.content.grid(row=0, column=1, sticky="nsew")
         self.main_frame.grid_columnconfigure(1, weight=1)
-        self.pages = {"recipes": RecipesPage(self.content),"substitutes": SubstitutePage(self.content),"shopping": ShoppingPage(self.content)}
+        self.pages = {}
 
-    def show_page(self, name):
-        if name == "shopping":
-            self.pages["shopping"].destroy()
-            self.pages["shopping"] = ShoppingPage(self.content)
+    def get_page(self, name):
+        if name not in self.pages:
+            module_name, class_name = PAGES[name]
+            page_class = getattr(importlib.import_module(module_name), class_name)
+            self.pages[name] = page_class(self.content, self.store)
+        return self.pages[name]
 
+    def show_page(self, name):
+        page = self.get_page(name)
         for p in self.pages.values():
             p.pack_forget()
 
-        self.pages[name].pack(fill="both", expand=True)
+        page.pack(fill="both", expand=True)
+
+    # Build the remaining PREFETCH pages one at a time while the app is idle
+    def prefetch_pages(self):
+        for name in PREFETCH:
+            if name not in self.pages:
+                self.get_page(name)
+                self.after(50, lambda: self.after_idle(self.prefetch_pages))
+                return
+
+    def on_save_error(self, e):
+        messagebox.showerror("Error", f"Failed to save recipes: {e}")
+
+    # Another window changed the same recipes first; the store has already put its version back
+    def on_save_conflict(self, changes):
+        names = sorted({c.get("name") or c["recipe"]["name"] for c in changes})
+        messagebox.showwarning("Not saved", "Changed in another window first, your change was not saved:\n" + "\n".join(names))
+
+    # Flush unsaved changes before closing
+    def on_close(self):
+        self.store.close()
+        if diagnostics.ENABLED:
+            try:
+                diagnostics.profiler.export()
+            except OSError:
+                pass    # the report is only for us, never block closing
+        self.destroy()
 
 if __name__ == "__main__":
     App().mainloop()
\ No newline at end of file
@@ -0,0 +1,195 @@
+import threading
+from array import array
+from collections.abc import Mapping
+
+# =====================================================
+# Compact Recipe Model
+# -----------------------------------------------------
+# A recipe loaded from JSON is a dict holding a list of
+# one dict per ingredient, and every "egg" / "g" in it is
+# its own string. With many recipes most of the memory
+# is dict overhead and repeated strings.
+#
+# Recipe keeps the same data in one __slots__ object:
+# ingredient names and units become ids into two shared
+# string tables (NAMES, UNITS), packed in one array("i")
+# as [name id, unit id, ...], and quantities and kcal go
+# in one array("d") as [qty, kcal, ...].
+#
+# Recipe and Ingredient are read-only Mappings, so code
+# written for the dicts (recipe["ingredients"],
+# ing.get("qty", 0), ...) keeps working. Use as_dict()
+# before writing a recipe out as JSON.
+#
+# compact_recipe() only converts recipes of the usual
+# shape (name, ingredients, total_cal; ingredients with
+# name, qty, unit, kcal and numeric amounts). Anything
+# else is kept as the dict it was, so no data is lost.
+# =====================================================
+# The tables are shared by the Tk thread, the loader and the
+# background writer: a new string is added under the lock, and its
+# id is published only after the string is in place.
+class StringTable:
+    def __init__(self):
+        self.strings = []       # id -> string
+        self.ids = {}           # string -> id
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, s):
+        sid = self.ids.get(s)
+        if sid is None:
+            with self.lock:
+                sid = self.ids.get(s)
+                if sid is None:
+                    sid = len(self.strings)
+                    self.strings.append(s)
+                    self.ids[s] = sid
+        return sid
+
+NAMES = StringTable()
+UNITS = StringTable()
+
+RECIPE_KEYS = ("name", "ingredients", "total_cal")
+INGREDIENT_KEYS = ("name", "qty", "unit", "kcal")
+RECIPE_KEY_SET = frozenset(RECIPE_KEYS)
+
+class Recipe(Mapping):
+    __slots__ = ("name", "total_cal", "text_ids", "amounts")
+
+    def __init__(self, name, total_cal, text_ids, amounts):
+        self.name = name
+        self.total_cal = total_cal
+        self.text_ids = text_ids    # array("i"): name id, unit id per ingredient
+        self.amounts = amounts      # array("d"): qty, kcal per ingredient
+
+    def __getitem__(self, key):
+        if key == "name":
+            return self.name
+        if key == "ingredients":
+            return [Ingredient(self, i) for i in range(len(self.amounts) // 2)]
+        if key == "total_cal":
+            return self.total_cal
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(RECIPE_KEYS)
+
+    def __len__(self):
+        return len(RECIPE_KEYS)
+
+    def __repr__(self):
+        return f"Recipe({self.as_dict()!r})"
+
+    def __reduce__(self):
+        return (Recipe.from_dict, (self.as_dict(),))
+
+    def as_dict(self):
+        return {"name": self.name, "ingredients": [ing.as_dict() for ing in self["ingredients"]], "total_cal": self.total_cal}
+
+    # None if the dict does not have the usual shape
+    @classmethod
+    def from_dict(cls, recipe):
+        if recipe.keys() != RECIPE_KEY_SET:
+            return None
+        name, ings, total = recipe["name"], recipe["ingredients"], recipe["total_cal"]
+        if not (type(name) is str and type(ings) is list and type(total) in (int, float)):
+            return None
+
+        text_ids, amounts = [], []
+        name_ids, unit_ids = NAMES.ids, UNITS.ids
+        for ing in ings:
+            # exactly the four keys: four entries and all of them found
+            if type(ing) is not dict or len(ing) != 4:
+                return None
+            try:
+                ing_name, unit, qty, kcal = ing["name"], ing["unit"], ing["qty"], ing["kcal"]
+            except KeyError:
+                return None
+            # ints would come back as floats, so only floats are packed
+            if not (type(ing_name) is str and type(unit) is str and type(qty) is float and type(kcal) is float):
+                return None
+            nid = name_ids.get(ing_name)
+            uid = unit_ids.get(unit)
+            text_ids += (NAMES.intern(ing_name) if nid is None else nid, UNITS.intern(unit) if uid is None else uid)
+            amounts += (qty, kcal)
+        return cls(name, total, array("i", text_ids), array("d", amounts))
+
+class Ingredient(Mapping):
+    __slots__ = ("recipe", "index")
+
+    def __init__(self, recipe, index):
+        self.recipe = recipe
+        self.index = index
+
+    def __getitem__(self, key):
+        i = 2 * self.index
+        if key == "name":
+            return NAMES.strings[self.recipe.text_ids[i]]
+        if key == "qty":
+            return self.recipe.amounts[i]
+        if key == "unit":
+            return UNITS.strings[self.recipe.text_ids[i + 1]]
+        if key == "kcal":
+            return self.recipe.amounts[i + 1]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(INGREDIENT_KEYS)
+
+    def __len__(self):
+        return len(INGREDIENT_KEYS)
+
+    def __repr__(self):
+        return f"Ingredient({self.as_dict()!r})"
+
+    def as_dict(self):
+        return {key: self[key] for key in INGREDIENT_KEYS}
+
+# A Recipe when the dict has the usual shape, otherwise the dict itself
+def compact_recipe(recipe):
+    if isinstance(recipe, Recipe):
+        return recipe
+    return Recipe.from_dict(recipe) or recipe
+
+# Plain dict for json.dump
+def as_dict(recipe):
+    return recipe.as_dict() if isinstance(recipe, Recipe) else recipe
+
+# =====================================================
+# Memory report: python model_module.py [count]
+# =====================================================
+def memory_report(count=100000):
+    import random, tracemalloc
+
+    rng = random.Random(1)
+    words = [f"ingredient {i}" for i in range(2000)]
+    units = ["g", "ml", "pcs", "tbsp", "tsp", "cup"]
+
+    def make(i):
+        # strings built fresh like json.load does, not shared literals
+        ings = [{"name": "".join(rng.choice(words)), "qty": float(rng.randint(1, 500)),
+                 "unit": "".join(rng.choice(units)), "kcal": float(rng.randint(1, 400))} for _ in range(rng.randint(3, 12))]
+        return {"name": f"Recipe {i}", "ingredients": ings, "total_cal": sum(ing["kcal"] for ing in ings)}
+
+    def measure(build):
+        tracemalloc.start()
+        data = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return data, size
+
+    rng.seed(1)
+    _, as_dicts = measure(lambda: [make(i) for i in range(count)])
+    rng.seed(1)
+    _, as_records = measure(lambda: [compact_recipe(make(i)) for i in range(count)])
+
+    print(f"{count} recipes")
+    print(f"  dicts:   {as_dicts / 2**20:7.1f} MB")
+    print(f"  records: {as_records / 2**20:7.1f} MB  ({as_records / as_dicts:.0%})")
+
+if __name__ == "__main__":
+    import sys
+    memory_report(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
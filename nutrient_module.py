@@ -0,0 +1,178 @@
+import csv, os, re, sqlite3, sys, uuid
+from functools import lru_cache
+
+# =====================================================
+# Nutrient Table (automatic calories)
+# -----------------------------------------------------
+# nutrients.csv lists foods with their calories per
+# 100 g, and optionally the weight of one piece:
+#
+#   name,kcal_100g,piece_g
+#   egg,143,50
+#
+# USDA-style exports work too ("description" for the
+# name, "energy_kcal" for the calories). The CSV can hold
+# hundreds of thousands of foods, so it is not read by
+# the app: build() turns it into nutrients.db, an SQLite
+# file indexed on the normalized name (food_key), and
+# NutrientDB looks names up in it with an LRU cache in
+# front. A lookup is a B-tree probe, a repeated one a
+# dict hit, so it can run on every keystroke.
+#
+# Names are matched on food_key (lower case, words only,
+# last word singular). If the exact name is unknown, the
+# shortest food starting with it is used ("egg" finds
+# "egg whole raw").
+#
+# kcal(name, qty, unit) converts qty to grams with
+# UNIT_GRAMS (ml count as grams); other units (pcs,
+# slice, ...) use the food's piece weight. It returns
+# None when the food or the unit is unknown.
+# =====================================================
+NUTRIENT_CSV = "nutrients.csv"
+NUTRIENT_DB = "nutrients.db"
+CACHE = 4096
+INSERT_BATCH = 5000
+
+NAME_COLUMNS = ("name", "description", "food")
+KCAL_COLUMNS = ("kcal_100g", "energy_kcal", "kcal", "calories")
+PIECE_COLUMNS = ("piece_g", "grams_each")
+
+UNIT_GRAMS = {"g": 1, "gram": 1, "grams": 1, "kg": 1000, "mg": 0.001,
+              "oz": 28.35, "lb": 453.6, "ml": 1, "l": 1000,
+              "cup": 240, "cups": 240, "tbsp": 15, "tsp": 5}
+
+NON_WORD = re.compile(r"[^\w]+")
+
+# "Green Beans," -> "green bean" (only the last word is made singular)
+def food_key(name):
+    words = NON_WORD.sub(" ", name.lower()).split()
+    if words:
+        words[-1] = singular(words[-1])
+    return " ".join(words)
+
+def singular(word):
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith(("oes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 2 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def pick_column(header, choices):
+    return next((h for h in choices if h in header), None)
+
+# ================== Building ====================
+def needs_build(csv_path=NUTRIENT_CSV, db_path=NUTRIENT_DB):
+    if not os.path.exists(csv_path):
+        return False
+    return not os.path.exists(db_path) or os.path.getmtime(db_path) < os.path.getmtime(csv_path)
+
+# CSV -> SQLite, streamed; yields ("build", rows so far, progress) for BackgroundLoader.
+# The first row of a name wins. Written to a temp file and swapped in.
+def build_in_steps(csv_path=NUTRIENT_CSV, db_path=NUTRIENT_DB):
+    tmp_path = f"{db_path}.{uuid.uuid4().hex[:8]}.tmp"     # two builders never share one
+    size = max(1, os.path.getsize(csv_path))
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE foods (key TEXT PRIMARY KEY, name TEXT, kcal_100g REAL, piece_g REAL) WITHOUT ROWID")
+        with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+            read = [0]
+
+            def lines():
+                for line in f:
+                    read[0] += len(line)
+                    yield line
+
+            reader = csv.DictReader(lines())
+            header = [(h or "").strip().lower() for h in reader.fieldnames or []]
+            reader.fieldnames = header
+            name_col, kcal_col = pick_column(header, NAME_COLUMNS), pick_column(header, KCAL_COLUMNS)
+            piece_col = pick_column(header, PIECE_COLUMNS)
+            if name_col is None or kcal_col is None:
+                raise ValueError("Nutrient CSV needs a name and a kcal_100g column")
+
+            batch, count = [], 0
+            for record in reader:
+                try:
+                    kcal = float(record[kcal_col])
+                    piece = float(record[piece_col]) if piece_col and record.get(piece_col) else None
+                except (TypeError, ValueError):
+                    continue
+                key = food_key(record[name_col] or "")
+                if key:
+                    batch.append((key, record[name_col].strip(), kcal, piece))
+                if len(batch) == INSERT_BATCH:
+                    conn.executemany("INSERT OR IGNORE INTO foods VALUES (?, ?, ?, ?)", batch)
+                    count += len(batch)
+                    batch = []
+                    yield "build", count, min(1.0, read[0] / size)
+            conn.executemany("INSERT OR IGNORE INTO foods VALUES (?, ?, ?, ?)", batch)
+            count += len(batch)
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(tmp_path)
+        raise
+    conn.close()
+    os.replace(tmp_path, db_path)
+    yield "build", count, 1.0
+
+def build(csv_path=NUTRIENT_CSV, db_path=NUTRIENT_DB):
+    count = 0
+    for _, count, _ in build_in_steps(csv_path, db_path):
+        pass
+    return count
+
+# =====================================================
+# Nutrient DB (read only)
+# =====================================================
+class NutrientDB:
+    def __init__(self, db_path=NUTRIENT_DB):
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.find = lru_cache(maxsize=CACHE)(self.query)
+
+    # key -> (kcal per 100 g, piece weight or None), None if unknown
+    def query(self, key):
+        if not key:
+            return None
+        row = self.conn.execute("SELECT kcal_100g, piece_g FROM foods WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            # the primary key index serves this range, shortest name first
+            row = self.conn.execute("SELECT kcal_100g, piece_g FROM foods WHERE key > ? AND key < ? "
+                                    "ORDER BY length(key) LIMIT 1", (key + " ", key + "!")).fetchone()
+        return row
+
+    def kcal(self, name, qty, unit):
+        food = self.find(food_key(name))
+        if food is None:
+            return None
+        kcal_100g, piece_g = food
+        unit = unit.strip().lower()
+        grams = UNIT_GRAMS.get(unit)
+        if grams is None:
+            if piece_g is None:
+                return None
+            grams = piece_g
+        return round(kcal_100g * qty * grams / 100, 1)
+
+    def close(self):
+        self.conn.close()
+
+# The table for scripts and importer workers (built first if the CSV is newer),
+# None if there is no nutrients.csv / nutrients.db. Opened once per process:
+# a forked pool worker must not use its parent's connection.
+opened = {}
+
+def shared(csv_path=NUTRIENT_CSV, db_path=NUTRIENT_DB):
+    key = (os.getpid(), csv_path, db_path)
+    if key not in opened:
+        if needs_build(csv_path, db_path):
+            build(csv_path, db_path)
+        opened[key] = NutrientDB(db_path) if os.path.exists(db_path) else None
+    return opened[key]
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else NUTRIENT_CSV
+    print(f"{build(source):,} rows read into {NUTRIENT_DB}")
@@ -0,0 +1,119 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+import heapq, math
+from repository_module import name_key
+
+# =====================================================
+# Nutrition Index
+# -----------------------------------------------------
+# Keeps (total kcal, recipe id) for every recipe in one
+# sorted list, so a calorie band is two bisects and a
+# slice, and the N lowest / highest are the two ends of
+# the list. For top-N within a subset (e.g. search hits)
+# a heap over just that subset is used instead.
+#
+# Per-ingredient kcal is stored column-wise like in
+# aggregate_module: name_col (interned ingredient name
+# id) and kcal_col, one slice per recipe in spans. A
+# recipe without a usable total_cal is ranked by the sum
+# of its slice.
+#
+# Add / edit / delete events move one entry in the
+# sorted list; nothing is rebuilt.
+# =====================================================
+class NutritionIndex:
+    def __init__(self, repo):
+        self.by_cal = []        # sorted (kcal, recipe id)
+        self.cal_of = {}        # recipe id -> kcal
+
+        self.names = []         # name id -> ingredient name
+        self.name_ids = {}      # name key -> name id
+        self.name_col = array("i")
+        self.kcal_col = array("d")
+        self.spans = {}         # recipe id -> (start, end)
+        self.dead = 0
+
+        entries = []
+        for rid, recipe in repo.items():
+            entries.append((self.add_columns(rid, recipe), rid))
+        entries.sort()
+        self.by_cal = entries
+        repo.subscribe(self.on_repo_change)
+
+    def __len__(self):
+        return len(self.by_cal)
+
+    # ================== Columns ====================
+    def intern(self, name):
+        key = name_key(name)
+        nid = self.name_ids.get(key)
+        if nid is None:
+            nid = len(self.names)
+            self.name_ids[key] = nid
+            self.names.append(name)
+        return nid
+
+    # Stores the recipe's ingredient kcal, returns the kcal it is ranked by
+    def add_columns(self, rid, recipe):
+        start = len(self.kcal_col)
+        for ing in recipe.get("ingredients", []):
+            self.name_col.append(self.intern(ing.get("name", "")))
+            self.kcal_col.append(to_kcal(ing.get("kcal", 0)))
+        self.spans[rid] = (start, len(self.kcal_col))
+
+        total = to_kcal(recipe.get("total_cal"), None)
+        if total is None:
+            total = round(sum(self.kcal_col[start:]), 9)
+        self.cal_of[rid] = total
+        return total
+
+    def remove_columns(self, rid):
+        start, end = self.spans.pop(rid)
+        self.dead += end - start
+        if self.dead > len(self.kcal_col) // 2:
+            self.compact()
+        return self.cal_of.pop(rid)
+
+    def compact(self):
+        name_col, kcal_col = array("i"), array("d")
+        for rid, (start, end) in self.spans.items():
+            self.spans[rid] = (len(kcal_col), len(kcal_col) + end - start)
+            name_col.extend(self.name_col[start:end])
+            kcal_col.extend(self.kcal_col[start:end])
+        self.name_col, self.kcal_col, self.dead = name_col, kcal_col, 0
+
+    def on_repo_change(self, event, rid, recipe):
+        if rid in self.spans:
+            old = self.remove_columns(rid)
+            del self.by_cal[bisect_left(self.by_cal, (old, rid))]
+        if event != "delete":
+            insort(self.by_cal, (self.add_columns(rid, recipe), rid))
+
+    # ================== Queries ====================
+    def calories(self, rid):
+        return self.cal_of.get(rid)
+
+    # Recipe ids with lo <= kcal <= hi (None = no limit), lowest kcal first
+    def in_range(self, lo=None, hi=None):
+        start = 0 if lo is None else bisect_left(self.by_cal, (lo, -1))
+        end = len(self.by_cal) if hi is None else bisect_right(self.by_cal, (hi, math.inf))
+        return [rid for _, rid in self.by_cal[start:end]]
+
+    # The n lowest-kcal recipe ids, optionally only among candidates
+    def lowest(self, n, candidates=None):
+        if candidates is None:
+            return [rid for _, rid in self.by_cal[:n]]
+        return heapq.nsmallest(n, candidates, key=self.cal_of.__getitem__)
+
+    def highest(self, n, candidates=None):
+        if candidates is None:
+            return [rid for _, rid in reversed(self.by_cal[-n:])] if n > 0 else []
+        return heapq.nlargest(n, candidates, key=self.cal_of.__getitem__)
+
+# Any number-like value as kcal; missing, bad or NaN gives default
+def to_kcal(value, default=0.0):
+    try:
+        kcal = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if math.isnan(kcal) else kcal
@@ -0,0 +1,97 @@
+from repository_module import name_key
+
+MAX_RESULTS = 200
+
+# =====================================================
+# Pantry Index ("what can I cook")
+# -----------------------------------------------------
+# Inverted index: ingredient name -> {recipe id: mask},
+# where mask has bit i set if the recipe's i-th
+# ingredient is that one. A pantry query ORs the masks
+# of the pantry items into one bitset per recipe it
+# touches, so only recipes sharing an ingredient with
+# the pantry are looked at. missing = ingredients minus
+# set bits.
+#
+# Recipes sharing nothing with the pantry can still be
+# "missing k" if they have k or fewer ingredients; those
+# come from by_size (ingredient count -> recipe ids).
+#
+# With use_subs, an ingredient also counts as on hand if
+# the pantry holds one of its direct substitutes.
+# =====================================================
+class PantryIndex:
+    def __init__(self, repo):
+        self.repo = repo
+        self.postings = {}      # ingredient key -> {recipe id: mask}
+        self.recipe_keys = {}   # recipe id -> [ingredient key, ...] (position = bit)
+        self.by_size = {}       # ingredient count -> set of recipe ids
+
+        for rid, recipe in repo.items():
+            self.add_recipe(rid, recipe)
+        repo.subscribe(self.on_repo_change)
+
+    def add_recipe(self, rid, recipe):
+        keys = [name_key(ing.get("name", "")) for ing in recipe.get("ingredients", [])]
+        self.recipe_keys[rid] = keys
+        self.by_size.setdefault(len(keys), set()).add(rid)
+        for bit, key in enumerate(keys):
+            masks = self.postings.setdefault(key, {})
+            masks[rid] = masks.get(rid, 0) | (1 << bit)
+
+    def remove_recipe(self, rid):
+        keys = self.recipe_keys.pop(rid, None)
+        if keys is None:
+            return
+        self.by_size[len(keys)].discard(rid)
+        for key in set(keys):
+            masks = self.postings[key]
+            masks.pop(rid, None)
+            if not masks:
+                del self.postings[key]
+
+    def on_repo_change(self, event, rid, recipe):
+        self.remove_recipe(rid)
+        if event != "delete":
+            self.add_recipe(rid, recipe)
+
+    # ================== Query ====================
+    # pantry: ingredient names on hand
+    # graph:  SubstitutionGraph, used when given to count substitutes
+    # Returns [(missing count, recipe id, missing names, {ingredient: substitute used}), ...]
+    def query(self, pantry, max_missing=0, graph=None, limit=MAX_RESULTS):
+        have = {name_key(p) for p in pantry if name_key(p)}
+
+        # ingredient key -> pantry item standing in for it
+        stand_ins = {}
+        if graph is not None:
+            for item in have:
+                for name, hops, _ in graph.replaces(item):
+                    key = name_key(name)
+                    if hops == 1 and key not in have:
+                        stand_ins.setdefault(key, item)
+
+        bits = {}
+        for key in have.union(stand_ins):
+            for rid, mask in self.postings.get(key, {}).items():
+                bits[rid] = bits.get(rid, 0) | mask
+
+        results = []
+        for rid, mask in bits.items():
+            keys = self.recipe_keys[rid]
+            missing = len(keys) - bin(mask).count("1")
+            if missing <= max_missing:
+                results.append((missing, rid))
+        for size in range(1, max_missing + 1):
+            results.extend((size, rid) for rid in self.by_size.get(size, ()) if rid not in bits)
+
+        results.sort(key=lambda r: (r[0], name_key(self.repo.get(r[1])["name"])))
+        found = []
+        for missing, rid in results[:limit]:
+            keys, mask = self.recipe_keys[rid], bits.get(rid, 0)
+            recipe = self.repo.get(rid)
+            missing_names = [ing["name"] for i, ing in enumerate(recipe["ingredients"]) if not mask >> i & 1]
+            used = {ing["name"]: stand_ins[keys[i]] for i, ing in enumerate(recipe["ingredients"])
+                    if mask >> i & 1 and keys[i] not in have}
+            found.append((missing, rid, missing_names, used))
+        return found
@@ -0,0 +1,75 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from pantry_index_module import PantryIndex, MAX_RESULTS
+
+BG_LIGHT = "#F7F9FC"
+PRIMARY = "#6F82EF"
+
+# =====================================================
+# Pantry Page
+# =====================================================
+def modern_button(parent, text, command, width=16):
+    btn = tk.Button(parent, text=text, command=command, width=width,bg=PRIMARY, fg="white",activebackground="#5B6EDC", activeforeground="white",relief="flat", font=("Segoe UI", 11, "bold"),cursor="hand2")
+    btn.bind("<Enter>", lambda e: btn.config(bg="#5B6EDC"))
+    btn.bind("<Leave>", lambda e: btn.config(bg=PRIMARY))
+    return btn
+
+class PantryPage(tk.Frame):
+    def __init__(self, parent, store):
+        super().__init__(parent, bg=BG_LIGHT)
+        self.store = store
+        self.repo = store.recipes
+        self.index = PantryIndex(self.repo)
+
+        tk.Label(self, text="What Can I Cook?",font=("Segoe UI", 22, "bold"),bg=BG_LIGHT, fg=PRIMARY).pack(pady=15)
+
+        main = tk.Frame(self, bg=BG_LIGHT)
+        main.pack(padx=40, pady=5, anchor="nw", fill="x")
+
+        tk.Label(main, text="Ingredients I have:",font=("Segoe UI", 13, "bold"),bg=BG_LIGHT, fg="#2C3E50").grid(row=0, column=0, pady=8, sticky="w")
+        self.pantry_entry = ttk.Entry(main, width=50, font=("Segoe UI", 12))
+        self.pantry_entry.grid(row=0, column=1, padx=10, sticky="w")
+        self.pantry_entry.bind("<Return>", lambda e: self.find_recipes())
+        tk.Label(main,text="# e.g: egg ; rice ; chicken",font=("Segoe UI", 9, "italic"),bg=BG_LIGHT,fg="#7F8C8D").grid(row=1, column=1, sticky="w", padx=10)
+
+        tk.Label(main, text="Allow missing up to:",font=("Segoe UI", 13, "bold"),bg=BG_LIGHT, fg="#2C3E50").grid(row=2, column=0, pady=8, sticky="w")
+        opts = tk.Frame(main, bg=BG_LIGHT)
+        opts.grid(row=2, column=1, padx=10, sticky="w")
+        self.missing_var = tk.IntVar(value=1)
+        ttk.Spinbox(opts, from_=0, to=5, width=4, textvariable=self.missing_var, state="readonly").pack(side="left")
+        tk.Label(opts, text="ingredients", font=("Segoe UI", 11), bg=BG_LIGHT).pack(side="left", padx=(5, 20))
+        self.use_subs = tk.BooleanVar(value=True)
+        ttk.Checkbutton(opts, text="Count substitutes I have", variable=self.use_subs).pack(side="left")
+
+        modern_button(main, "Find Recipes", self.find_recipes, 18).grid(row=3, column=1, pady=12, padx=10, sticky="w")
+
+        tk.Label(self, text="Recipes:",font=("Segoe UI", 14, "bold"),bg=BG_LIGHT, fg="#2C3E50").pack(anchor="w", padx=40, pady=(5, 5))
+        self.result_box = tk.Text(self, width=70, height=12, wrap="word",font=("Segoe UI", 12), bg="white")
+        self.result_box.pack(padx=40, pady=5)
+        self.result_box.config(state="disabled")
+
+    def find_recipes(self):
+        pantry = [p.strip() for p in self.pantry_entry.get().split(";") if p.strip()]
+        if not pantry:
+            messagebox.showwarning("Warning", "Please enter the ingredients you have.")
+            return
+
+        graph = self.store.substitution_graph if self.use_subs.get() else None
+        results = self.index.query(pantry, self.missing_var.get(), graph)
+
+        lines = []
+        for missing, rid, missing_names, used in results:
+            name = self.repo.get(rid)["name"]
+            line = f"✔ {name}" if missing == 0 else f"• {name} — missing: {', '.join(missing_names)}"
+            if used:
+                line += "  (using " + ", ".join(f"{sub} for {ing}" for ing, sub in used.items()) + ")"
+            lines.append(line)
+        if not lines:
+            lines.append("No recipes match. Try allowing more missing ingredients.")
+        elif len(results) == MAX_RESULTS:
+            lines.append(f"... showing the best {MAX_RESULTS}")
+
+        self.result_box.config(state="normal")
+        self.result_box.delete("1.0", "end")
+        self.result_box.insert("end", "\n".join(lines))
+        self.result_box.config(state="disabled")
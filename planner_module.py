@@ -0,0 +1,202 @@
+import math, time
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate
+from repository_module import name_key
+
+# =====================================================
+# Meal Planner
+# -----------------------------------------------------
+# Picks n different recipes whose calories add up to a
+# band lo..hi (n = 3 for a day, 21 for a week), and
+# prefers plans needing fewer different ingredients,
+# i.e. a shorter shopping list. Ties go to the total
+# nearest the middle of the band.
+#
+# Branch and bound over the recipes in calorie order
+# (NutritionIndex.by_cal) with prefix sums over it:
+# - with k picks left, the next recipe must leave room
+#   for the k-1 smallest and still reach lo with the
+#   k-1 largest: a bisect window, nothing outside it is
+#   looked at
+# - a partial plan already using as many ingredients as
+#   the worst of the best `top` plans is dropped
+# - a step tries the BRANCH candidates adding the fewest
+#   new ingredients, picked from recipes sharing an
+#   ingredient with the plan (through postings, rarest
+#   ingredient first, at most PARTNERS) and the SCAN
+#   recipes nearest the kcal the step would ideally
+#   have; the first step goes through the whole window,
+#   fewest ingredients first
+# - recipes tried earlier as siblings are left out of
+#   later subtrees, so no set of recipes is seen twice
+#
+# The search stops after budget_ms with the best plans
+# found so far, so it stays interactive on a catalog of
+# any size.
+#
+# Ingredients are kept as a tuple of ids per recipe plus
+# postings (ingredient id -> recipe ids), updated from
+# recipe events like PantryIndex.
+# =====================================================
+TOP_PLANS = 5
+BUDGET_MS = 250
+BRANCH = 8
+SCAN = 48
+PARTNERS = 200
+
+class MealPlanner:
+    def __init__(self, repo, nutrition):
+        self.nutrition = nutrition
+        self.ing_ids = {}       # ingredient name key -> id
+        self.ings = {}          # recipe id -> (ingredient id, ...)
+        self.postings = {}      # ingredient id -> set of recipe ids
+
+        for rid, recipe in repo.items():
+            self.add_recipe(rid, recipe)
+        repo.subscribe(self.on_repo_change)
+
+    def add_recipe(self, rid, recipe):
+        ids = set()
+        for ing in recipe.get("ingredients", []):
+            key = name_key(ing.get("name", ""))
+            iid = self.ing_ids.get(key)
+            if iid is None:
+                iid = self.ing_ids[key] = len(self.ing_ids)
+            ids.add(iid)
+        self.ings[rid] = tuple(ids)
+        for iid in ids:
+            self.postings.setdefault(iid, set()).add(rid)
+
+    def remove_recipe(self, rid):
+        for iid in self.ings.pop(rid, ()):
+            self.postings[iid].discard(rid)
+
+    def on_repo_change(self, event, rid, recipe):
+        self.remove_recipe(rid)
+        if event != "delete":
+            self.add_recipe(rid, recipe)
+
+    # Returns ([{"recipes": [recipe id, ...], "total_cal", "ingredients": count}, ...]
+    # best first, True if the time budget ran out before the search was done)
+    def plan(self, n, lo, hi, top=TOP_PLANS, budget_ms=BUDGET_MS):
+        search = PlanSearch(self, n, lo, hi, top, time.perf_counter() + budget_ms / 1000)
+        search.run()
+        plans = [{"recipes": list(rids), "total_cal": round(total, 9), "ingredients": count}
+                 for count, _, rids, total in search.best]
+        return plans, search.timed_out
+
+# =====================================================
+# One search (state of a single plan() call)
+# =====================================================
+class PlanSearch:
+    def __init__(self, planner, n, lo, hi, top, deadline):
+        self.ings = planner.ings
+        self.postings = planner.postings
+        self.cal_of = planner.nutrition.cal_of
+        self.n, self.lo, self.hi, self.top = n, lo, hi, top
+        self.mid = (lo + hi) / 2
+        self.deadline = deadline
+        self.timed_out = False
+        self.best = []          # sorted (ingredient count, distance from mid, recipe ids, kcal)
+
+        # only recipes with 0 <= kcal <= hi can be in a plan
+        by_cal = planner.nutrition.by_cal
+        self.by_cal = by_cal[bisect_left(by_cal, (0, -1)):bisect_right(by_cal, (hi, math.inf))]
+        self.prefix = list(accumulate((kcal for kcal, _ in self.by_cal), initial=0))
+
+    # Sum of the k smallest / largest kcal (bounds, chosen recipes not left out)
+    def min_sum(self, k):
+        return self.prefix[k]
+
+    def max_sum(self, k):
+        return self.prefix[-1] - self.prefix[len(self.by_cal) - k]
+
+    def run(self):
+        n = self.n
+        if n < 1 or len(self.by_cal) < n or self.min_sum(n) > self.hi or self.max_sum(n) < self.lo:
+            return
+        start, end = self.window(0, n)
+        first = sorted(range(start, end), key=lambda i: len(self.ings[self.by_cal[i][1]]))
+        banned = set()
+        for i in first:
+            if self.out_of_time() or (self.full() and len(self.ings[self.by_cal[i][1]]) >= self.best[-1][0]):
+                break
+            kcal, rid = self.by_cal[i]
+            self.step([rid], set(self.ings[rid]), kcal, banned)
+            banned.add(rid)
+
+    def full(self):
+        return len(self.best) >= self.top
+
+    def out_of_time(self):
+        if time.perf_counter() > self.deadline:
+            self.timed_out = True
+        return self.timed_out
+
+    # by_cal positions the next of k picks can come from
+    def window(self, cur, k):
+        low = self.lo - cur - self.max_sum(k - 1)
+        high = self.hi - cur - self.min_sum(k - 1)
+        return bisect_left(self.by_cal, (low, -1)), bisect_right(self.by_cal, (high, math.inf))
+
+    def step(self, chosen, used, cur, banned):
+        k = self.n - len(chosen)
+        if k == 0:
+            return self.record(chosen, len(used), cur)
+        if self.out_of_time() or (self.full() and len(used) >= self.best[-1][0]):
+            return
+        tried = []
+        for new, _, rid in self.candidates(chosen, used, cur, k, banned):
+            if self.full() and len(used) + new >= self.best[-1][0]:
+                break       # sorted by new, the rest can only be worse
+            ings = self.ings[rid]
+            self.step(chosen + [rid], used.union(ings), cur + self.cal_of[rid], banned)
+            banned.add(rid)
+            tried.append(rid)
+        banned.difference_update(tried)
+
+    # The BRANCH best next picks: [(new ingredients, kcal off the ideal, recipe id), ...]
+    def candidates(self, chosen, used, cur, k, banned):
+        start, end = self.window(cur, k)
+        if start >= end:
+            return []
+        low, high = self.by_cal[start][0], self.by_cal[end - 1][0]
+        skip = banned.union(chosen)
+        found = set()
+
+        # recipes sharing an ingredient with the plan, rarest ingredient first
+        for iid in sorted(used, key=lambda iid: len(self.postings[iid])):
+            for rid in self.postings[iid]:
+                if rid not in skip and low <= self.cal_of[rid] <= high:
+                    found.add(rid)
+            if len(found) >= PARTNERS:
+                break
+
+        # and the ones nearest the ideal kcal for this pick, both ways
+        ideal = (self.mid - cur) / k
+        at = min(max(bisect_left(self.by_cal, (ideal, -1)), start), end)
+        left, right, near = at - 1, at, 0
+        while near < SCAN and (left >= start or right < end):
+            if right < end and (left < start or self.by_cal[right][0] - ideal <= ideal - self.by_cal[left][0]):
+                rid = self.by_cal[right][1]
+                right += 1
+            else:
+                rid = self.by_cal[left][1]
+                left -= 1
+            if rid not in skip:
+                found.add(rid)
+                near += 1
+
+        scored = []
+        for rid in found:
+            ings = self.ings[rid]
+            scored.append((len(ings) - len(used.intersection(ings)), abs(self.cal_of[rid] - ideal), rid))
+        scored.sort()
+        return scored[:BRANCH]
+
+    def record(self, chosen, count, total):
+        if not self.lo <= total <= self.hi:
+            return
+        insort(self.best, (count, abs(total - self.mid), tuple(chosen), total))
+        if len(self.best) > self.top:
+            self.best.pop()
@@ -1,10 +1,16 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import json, os, re
+from tkinter import ttk, messagebox, filedialog
+from widgets_module import VirtualListView, DetailWindow
+from core_module import parse_ingredients
+from loader_module import BackgroundLoader
+from importer_module import parse_in_batches, dedupe, write_report, report_path
 
 BG_LIGHT = "#F7F9FC"
-RECIPE_FILE = "recipes.json"
 PRIMARY = "#6F82EF"
+CAL_MODES = ["All", "Lowest 20", "Highest 20"]
+TOP_N = 20
+SEARCH_DELAY_MS = 150
+CAL_PLACEHOLDER = "e.g: 70 ; auto ; 41  (blank = all auto)"
 
 def modern_button(parent, text, command, width=12):
     btn = tk.Button(parent, text=text, command=command, width=width,bg=PRIMARY, fg="white",activebackground="#5B6EDC", activeforeground="white",relief="flat", font=("Segoe UI", 10, "bold"))
@@ -13,10 +19,11 @@ def modern_button(parent, text, command, width=12):
     return btn
 
 class RecipesPage(tk.Frame):
-    def __init__(self, parent):
+    def __init__(self, parent, store):
         super().__init__(parent, bg=BG_LIGHT)
-        self.editing_index = None
-        self.load_recipes()
+        self.editing_id = None
+        self.store = store
+        self.repo = store.recipes
         tk.Label(self, text="Recipes Manager",font=("Segoe UI", 20, "bold"),bg=BG_LIGHT, fg=PRIMARY).pack(pady=10)
         main = tk.Frame(self, bg=BG_LIGHT)
         main.pack(fill="both", expand=True, padx=40, pady=20)
@@ -34,7 +41,14 @@ class RecipesPage(tk.Frame):
         make_row("Recipe Name                   :", "recipe_name", "e.g: Fried Rice")
         make_row("Ingredients Name          :", "ing_text", "e.g: egg ; rice ; carrot")
         make_row("Quantity                            :", "qty_text", "e.g: 2(pcs) ; 200(g) ; 50(g)")
-        make_row("Calories per ingredient :", "cal_text", "e.g: 70 ; 300 ; 41")
+        make_row("Calories per ingredient :", "cal_text", CAL_PLACEHOLDER)
+
+        # calories as they will be saved, worked out on every keystroke
+        # (blank or "auto" calories come from the nutrient table)
+        self.cal_preview = tk.Label(main, text="",font=("Segoe UI", 10, "italic"),bg=BG_LIGHT, fg="#7F8C8D")
+        self.cal_preview.pack(anchor="w", padx=(190, 0))
+        for entry in (self.ing_text, self.qty_text, self.cal_text):
+            entry.bind("<KeyRelease>", self.update_cal_preview)
 
         # Add Button
         btn_area = tk.Frame(main, bg=BG_LIGHT)
@@ -46,9 +60,46 @@ class RecipesPage(tk.Frame):
         box = tk.Frame(main, bg=BG_LIGHT)
         box.pack(fill="both", expand=True, pady=(10, 5))
 
-        tk.Label(box, text="Recipe",font=("Segoe UI", 14, "bold"),bg=BG_LIGHT, fg=PRIMARY).pack(anchor="w")
-
-        self.recipe_list = tk.Listbox(box, width=70, height=7,font=("Segoe UI", 12))
+        header = tk.Frame(box, bg=BG_LIGHT)
+        header.pack(fill="x")
+        tk.Label(header, text="Recipe",font=("Segoe UI", 14, "bold"),bg=BG_LIGHT, fg=PRIMARY).pack(side="left")
+
+        # Search box, runs SEARCH_DELAY_MS after the last keystroke
+        self.search_query = ""
+        self.search_job = None
+        tk.Label(header, text="🔍",font=("Segoe UI", 11),bg=BG_LIGHT).pack(side="left", padx=(15, 2))
+        self.search_entry = ttk.Entry(header, width=18, font=("Segoe UI", 11))
+        self.search_entry.pack(side="left")
+        self.search_entry.bind("<KeyRelease>", self.on_search_key)
+
+        # Calorie filter (served by the store's nutrition index)
+        self.cal_filter = None
+        self.refresh_job = None
+        filt = tk.Frame(header, bg=BG_LIGHT)
+        filt.pack(side="right")
+        tk.Label(filt, text="Calories:",font=("Segoe UI", 11),bg=BG_LIGHT, fg="#2C3E50").pack(side="left")
+        self.min_cal = ttk.Entry(filt, width=7, font=("Segoe UI", 11))
+        self.min_cal.pack(side="left", padx=(5, 2))
+        tk.Label(filt, text="to",font=("Segoe UI", 11),bg=BG_LIGHT, fg="#2C3E50").pack(side="left")
+        self.max_cal = ttk.Entry(filt, width=7, font=("Segoe UI", 11))
+        self.max_cal.pack(side="left", padx=(2, 8))
+        self.cal_mode = ttk.Combobox(filt, values=CAL_MODES, state="readonly", width=11)
+        self.cal_mode.current(0)
+        self.cal_mode.pack(side="left", padx=(0, 8))
+        modern_button(filt, "Filter", self.apply_cal_filter, width=7).pack(side="left", padx=2)
+        modern_button(filt, "Clear", self.clear_cal_filter, width=7).pack(side="left", padx=2)
+
+        # Loading progress (recipes stream in on a worker thread, see store_module)
+        self.load_frame = tk.Frame(box, bg=BG_LIGHT)
+        self.load_bar = ttk.Progressbar(self.load_frame, length=200, maximum=100, mode="determinate")
+        self.load_bar.pack(side="left")
+        self.load_label = tk.Label(self.load_frame, text="",font=("Segoe UI", 10, "italic"),bg=BG_LIGHT, fg="#7F8C8D")
+        self.load_label.pack(side="left", padx=10)
+        # shown when loading failed, the buttons stay off until a load works
+        self.retry_btn = modern_button(self.load_frame, "Retry", self.retry_load, width=8)
+
+        # only the visible rows are in the Listbox, see widgets_module
+        self.recipe_list = VirtualListView(box, self.recipe_label, height=7, width=70, font=("Segoe UI", 12))
         self.recipe_list.pack(pady=5, fill="x")
 
         # Edit,View and Delete buttons
@@ -58,14 +109,23 @@ class RecipesPage(tk.Frame):
         self.edit_btn = modern_button(btns, "Edit", self.start_edit)
         self.view_btn = modern_button(btns, "View", self.view_recipe)
         self.delete_btn = modern_button(btns, "Delete", self.delete_recipe)
+        self.import_btn = modern_button(btns, "Import...", self.import_file)
 
         self.edit_btn.pack(side="left", padx=10)
         self.view_btn.pack(side="left", padx=10)
         self.delete_btn.pack(side="left", padx=10)
+        self.import_btn.pack(side="left", padx=10)
+        self.import_results = None
 
         #cancel button after ckick edit button
         self.cancel_btn = modern_button(btn_area, "Cancel", self.cancel_edit)
         self.refresh_recipe_list()
+        self.store.subscribe("recipes", self.on_repo_change)
+        self.store.subscribe("load", self.on_load_event)
+        if self.store.loading:
+            self.on_load_event("progress", None, self.store.load_progress)
+        else:
+            self.warn_orphaned_journal()
 
     # logic for placeholder
     def add_placeholder(self, entry, text):
@@ -95,129 +155,124 @@ class RecipesPage(tk.Frame):
         self.add_placeholder(self.recipe_name, "e.g: Fried Rice")
         self.add_placeholder(self.ing_text, "e.g: egg ; rice ; carrot")
         self.add_placeholder(self.qty_text, "e.g: 2(pcs) ; 200(g) ; 50(g)")
-        self.add_placeholder(self.cal_text, "e.g: 70 ; 300 ; 41")
+        self.add_placeholder(self.cal_text, CAL_PLACEHOLDER)
+        self.cal_preview.config(text="")
+
+    # Ingredient, quantity and calorie fields, a placeholder counts as empty
+    def ingredient_fields(self):
+        fields = [entry.get().strip() for entry in (self.ing_text, self.qty_text, self.cal_text)]
+        return ["" if field.startswith("e.g") else field for field in fields]
+
+    def update_cal_preview(self, event=None):
+        ing_raw, qty_raw, cal_raw = self.ingredient_fields()
+        if not ing_raw:
+            return self.cal_preview.config(text="")
+        data, err = parse_ingredients(ing_raw, qty_raw, cal_raw, self.store.nutrients, self.store.building_nutrients)
+        if err:
+            return self.cal_preview.config(text=err)
+        parts = " + ".join(f"{ing['kcal']:g}" for ing in data["ingredients"])
+        self.cal_preview.config(text=f"Total: {data['total']:g} kcal  ({parts})")
 
     # Add / Save Switch
     def on_add_or_save(self):
-        if self.editing_index is None:
+        if self.editing_id is None:
             self.add_recipe()
         else:
             self.save_edit()
 
-    # User input format
-    def parse_ingredients(self, ing_raw, qty_raw, cal_raw):
-        names = [n.strip() for n in ing_raw.split(";") if n.strip()]
-        qtys = [q.strip() for q in qty_raw.split(";") if q.strip()]
-        cals = [c.strip() for c in cal_raw.split(";") if c.strip()]
-
-        if not (len(names) == len(qtys) == len(cals)):
-            return None, "Ingredient count mismatch"
-
-        ingredients = []
-        total = 0
-
-        for name, qty_str, cal_str in zip(names, qtys, cals):
-            match = re.match(r"^\s*([\d.]+)\s*\((.*?)\)\s*$", qty_str)
-            if not match:
-                return None, f"Invalid quantity format: {qty_str}"
-
-            qty = float(match.group(1))
-            unit = match.group(2)
-
-            try:
-                kcal = float(cal_str)
-            except:
-                return None, f"Invalid calorie: {cal_str}"
-
-            ingredients.append({"name": name, "qty": qty, "unit": unit, "kcal": kcal})
-            total += kcal
-
-        return {"ingredients": ingredients, "total": total}, None
-
     # Add Recipe
     def add_recipe(self):
         name = self.recipe_name.get().strip()
-        ing_raw = self.ing_text.get().strip()
-        qty_raw = self.qty_text.get().strip()
-        cal_raw = self.cal_text.get().strip()
+        ing_raw, qty_raw, cal_raw = self.ingredient_fields()
 
         if name.startswith("e.g"):
             messagebox.showwarning("Warning", "Please enter actual recipe name.")
             return
 
-        data, err = self.parse_ingredients(ing_raw, qty_raw, cal_raw)
+        data, err = parse_ingredients(ing_raw, qty_raw, cal_raw, self.store.nutrients, self.store.building_nutrients)
         if err:
             messagebox.showwarning("Error", err)
             return
 
         # Duplicate check
-        if any(r["name"].lower() == name.lower() for r in self.recipes):
+        if name in self.repo:
             messagebox.showwarning("Error", "Recipe already exists.")
             return
 
-        self.recipes.append({"name": name,"ingredients": data["ingredients"],"total_cal": data["total"]})
-        self.save_recipes()
-        self.refresh_recipe_list()
+        recipe = {"name": name,"ingredients": data["ingredients"],"total_cal": data["total"]}
+        self.store.add_recipe(recipe)
 
         messagebox.showinfo("Success", f"Recipe '{name}' added!")
         self.restore_all_placeholders()
 
     # View Recipe
     def view_recipe(self):
-        sel = self.recipe_list.curselection()
-        if not sel:
+        rid = self.recipe_list.selected_id()
+        if rid is None:
             return messagebox.showwarning("Warning", "Select a recipe to view.")
 
-        recipe = self.recipes[sel[0]]
-
-        win = tk.Toplevel(self)
-        win.title(recipe["name"])
-        win.geometry("450x400")
-        win.configure(bg=BG_LIGHT)
-        win.grab_set()
-
-        tk.Label(win, text=recipe["name"],font=("Segoe UI", 18, "bold"),bg=BG_LIGHT).pack(pady=10)
-
-        frame = tk.Frame(win, bg=BG_LIGHT)
-        frame.pack(pady=5)
-
-        tk.Label(frame, text="Ingredients:",font=("Segoe UI", 14, "bold"),bg=BG_LIGHT).pack(anchor="w")
-
-        for ing in recipe["ingredients"]:
-            line = f"- {ing['name']} : {ing['qty']}({ing['unit']}) - {ing['kcal']} kcal"
-            tk.Label(frame, text=line, font=("Segoe UI", 12), bg=BG_LIGHT).pack(anchor="w")
-
-        tk.Label(win, text=f"Total Calories: {recipe['total_cal']} kcal",font=("Segoe UI", 14, "bold"), bg=BG_LIGHT).pack(pady=10)
-
-        modern_button(win, "Close", win.destroy).pack(pady=15)
+        recipe = self.repo.get(rid)
+        lines = [f"- {ing['name']} : {ing['qty']}({ing['unit']}) - {ing['kcal']} kcal" for ing in recipe["ingredients"]]
+        # one window, hidden on Close and filled again here (see widgets_module)
+        DetailWindow.get(self, "recipe", "450x400").show(recipe["name"], recipe["name"], lines, subheading="Ingredients:", footer=f"Total Calories: {recipe['total_cal']} kcal")
 
     # Delete Recipe
     def delete_recipe(self):
-        sel = self.recipe_list.curselection()
-        if not sel:
+        rid = self.recipe_list.selected_id()
+        if rid is None:
             return messagebox.showwarning("Warning", "Select a recipe to delete.")
 
-        name = self.recipe_list.get(sel[0])
+        name = self.repo.get(rid)["name"]
 
         if not messagebox.askyesno("Confirm", f"Delete recipe '{name}'?"):
             return
 
-        self.recipes = [r for r in self.recipes if r["name"] != name]
-        self.save_recipes()
-        self.refresh_recipe_list()
+        if self.editing_id is not None:
+            self.cancel_edit()
+
+        self.store.delete_recipe(rid)
         messagebox.showinfo("Success", f"Deleted '{name}'")
 
-        if self.editing_index is not None:
-            self.cancel_edit()
+    # Import recipes from a CSV / JSONL file (importer_module), parsed off the Tk thread
+    def import_file(self):
+        path = filedialog.askopenfilename(title="Import recipes",filetypes=[("Recipe files", "*.csv *.jsonl"), ("All files", "*.*")])
+        if not path:
+            return
+        self.import_results = []
+        self.import_btn.config(state="disabled", text="Importing...")
+        BackgroundLoader(self, parse_in_batches(path), self.on_import_rows, lambda error: self.on_import_done(path, error))
+
+    def on_import_rows(self, kind, rows, progress):
+        self.import_results.extend(rows)
+        self.import_btn.config(text=f"{progress:.0%}")
+
+    def on_import_done(self, path, error):
+        parsed, self.import_results = self.import_results, None
+        self.import_btn.config(state="disabled" if self.store.loading else "normal", text="Import...")
+        if error is not None:
+            return messagebox.showerror("Error", f"Could not import '{path}': {error}")
+
+        recipes, errors = dedupe(parsed, self.repo)
+        try:
+            if recipes:
+                self.store.add_recipes(recipes)
+            if errors:
+                write_report(report_path(path), errors)
+        except OSError as e:
+            return messagebox.showerror("Error", f"Import failed: {e}")
+
+        text = f"Imported {len(recipes)} recipes."
+        if errors:
+            text += f"\n{len(errors)} rows skipped, see {report_path(path)}"
+        messagebox.showinfo("Import", text)
 
     # Edit recipe
     def start_edit(self):
-        sel = self.recipe_list.curselection()
-        if not sel:
+        rid = self.recipe_list.selected_id()
+        if rid is None:
             return messagebox.showwarning("Warning", "Select a recipe to edit.")
 
-        idx = sel[0]
-        recipe = self.recipes[idx]
+        recipe = self.repo.get(rid)
 
         self.recipe_name.delete(0, "end")
         self.recipe_name.insert(0, recipe["name"])
@@ -232,56 +287,171 @@ class RecipesPage(tk.Frame):
         self.qty_text.insert(0, " ; ".join(qtys))
         self.cal_text.delete(0, "end")
         self.cal_text.insert(0, " ; ".join(cals))
+        self.update_cal_preview()
 
-        self.editing_index = idx
+        self.editing_id = rid
         self.add_btn.config(text="Save Changes")
         self.cancel_btn.pack(anchor="center", pady=(6, 0))
 
     # Save Edit
     def save_edit(self):
-        if self.editing_index is None:
+        if self.editing_id is None:
             return
+        if self.repo.get(self.editing_id) is None:
+            self.cancel_edit()
+            return messagebox.showwarning("Error", "This recipe was deleted in another window.")
 
         name = self.recipe_name.get().strip()
-        ing_raw = self.ing_text.get().strip()
-        qty_raw = self.qty_text.get().strip()
-        cal_raw = self.cal_text.get().strip()
+        ing_raw, qty_raw, cal_raw = self.ingredient_fields()
 
-        data, err = self.parse_ingredients(ing_raw, qty_raw, cal_raw)
+        data, err = parse_ingredients(ing_raw, qty_raw, cal_raw, self.store.nutrients, self.store.building_nutrients)
         if err:
             messagebox.showwarning("Error", err)
             return
 
-        for idx, r in enumerate(self.recipes):
-            if idx != self.editing_index and r["name"].lower() == name.lower():
-                return messagebox.showwarning("Error", "Another recipe has this name.")
+        if self.repo.name_taken(name, exclude_id=self.editing_id):
+            return messagebox.showwarning("Error", "Another recipe has this name.")
 
-        self.recipes[self.editing_index] = {"name": name,"ingredients": data["ingredients"],"total_cal": data["total"]}
-
-        self.save_recipes()
-        self.refresh_recipe_list()
-        messagebox.showinfo("Success", f"Recipe '{name}' updated!")
+        recipe = {"name": name,"ingredients": data["ingredients"],"total_cal": data["total"]}
+        rid = self.editing_id
         self.cancel_edit()
+        self.store.update_recipe(rid, recipe)
+        messagebox.showinfo("Success", f"Recipe '{name}' updated!")
 
     # Cancel Edit
     def cancel_edit(self):
-        self.editing_index = None
+        self.editing_id = None
         self.add_btn.config(text="Add Recipe")
         self.cancel_btn.pack_forget()
         self.restore_all_placeholders()
 
-    # JSON File input and output
-    def load_recipes(self):
-        if os.path.exists(RECIPE_FILE):
-            self.recipes = json.load(open(RECIPE_FILE, "r", encoding="utf-8"))
+    # Calorie filter
+    def apply_cal_filter(self):
+        try:
+            lo = float(self.min_cal.get()) if self.min_cal.get().strip() else None
+            hi = float(self.max_cal.get()) if self.max_cal.get().strip() else None
+        except ValueError:
+            return messagebox.showwarning("Warning", "Calories must be numbers.")
+
+        mode = self.cal_mode.get()
+        if lo is None and hi is None and mode == CAL_MODES[0]:
+            self.cal_filter = None
         else:
-            self.recipes = []
+            self.cal_filter = (lo, hi, mode)
+        self.refresh_recipe_list()
 
-    def save_recipes(self):
-        json.dump(self.recipes, open(RECIPE_FILE, "w",encoding="utf-8"),ensure_ascii=False, indent=2)
+    def clear_cal_filter(self):
+        self.min_cal.delete(0, "end")
+        self.max_cal.delete(0, "end")
+        self.cal_mode.current(0)
+        self.cal_filter = None
+        self.refresh_recipe_list()
+
+    # Search box
+    def on_search_key(self, e=None):
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DELAY_MS, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        query = self.search_entry.get().strip()
+        if query != self.search_query:
+            self.search_query = query
+            self.refresh_recipe_list()
 
-    # Refresh Recipe List
+    def filtered(self):
+        return self.cal_filter is not None or self.search_query != ""
+
+    # Refresh Recipe List (full reset, later changes arrive through on_repo_change)
     def refresh_recipe_list(self):
-        self.recipe_list.delete(0, "end")
-        for r in self.recipes:
-            self.recipe_list.insert("end", r["name"])
\ No newline at end of file
+        self.refresh_job = None
+        hits = self.store.recipe_index.search(self.search_query) if self.search_query else None
+        if self.cal_filter is None:
+            return self.recipe_list.set_ids(self.repo.ids() if hits is None else hits)
+
+        lo, hi, mode = self.cal_filter
+        index = self.store.nutrition_index
+        if hits is not None:
+            # search hits are usually few: check their calories one by one
+            cal = index.calories
+            hits = [rid for rid in hits if (lo is None or cal(rid) >= lo) and (hi is None or cal(rid) <= hi)]
+            if mode == CAL_MODES[0]:
+                self.recipe_list.set_ids(hits)
+            else:
+                top = index.lowest(TOP_N, hits) if mode == CAL_MODES[1] else index.highest(TOP_N, hits)
+                self.recipe_list.set_ids(top, ordered=True)
+        elif mode == CAL_MODES[0]:
+            self.recipe_list.set_ids(index.in_range(lo, hi))
+        elif lo is None and hi is None:
+            top = index.lowest(TOP_N) if mode == CAL_MODES[1] else index.highest(TOP_N)
+            self.recipe_list.set_ids(top, ordered=True)
+        else:
+            # in_range is lowest first, so the top-N are its ends
+            ranked = index.in_range(lo, hi)
+            top = ranked[:TOP_N] if mode == CAL_MODES[1] else ranked[:-TOP_N - 1:-1]
+            self.recipe_list.set_ids(top, ordered=True)
+
+    def recipe_label(self, rid):
+        name = self.repo.get(rid)["name"]
+        if self.cal_filter is None:
+            return name
+        return f"{name}  ({self.store.nutrition_index.calories(rid):g} kcal)"
+
+    def on_repo_change(self, event, rid, recipe):
+        # only another window (DataStore.sync) changes the recipe in the form,
+        # this page ends its own edit before saving or deleting
+        if rid == self.editing_id and event != "add":
+            self.on_edited_elsewhere(event, recipe["name"])
+
+        # a filtered list is recomputed (once per burst of changes)
+        if self.filtered():
+            if event == "delete":
+                self.recipe_list.remove_id(rid)
+            if self.refresh_job is None:
+                self.refresh_job = self.after_idle(self.refresh_recipe_list)
+        elif event == "add":
+            self.recipe_list.insert_id(rid)
+        elif event == "update":
+            self.recipe_list.update_id(rid)
+        else:
+            self.recipe_list.remove_id(rid)
+
+    # The message waits for the repository to finish notifying the other pages
+    def on_edited_elsewhere(self, event, name):
+        if event == "delete":
+            self.cancel_edit()
+            self.after_idle(lambda: messagebox.showwarning("Recipe deleted", f"'{name}' was deleted in another window, your edit was cancelled."))
+        else:
+            self.after_idle(lambda: messagebox.showwarning("Recipe changed", f"'{name}' was changed in another window. Saving will replace their changes, Cancel and Edit again to see them."))
+
+    # recipes.json was changed outside the app, so the journal saved on top
+    # of the old file was set aside instead of applied (see RecipeStorage)
+    def warn_orphaned_journal(self):
+        orphan = self.store.storage.orphaned
+        if orphan:
+            self.after_idle(lambda: messagebox.showwarning("Changes set aside", f"'{self.store.recipe_file}' was changed outside the app, so the recipe changes saved on top of the old file were not applied.\nThey are kept in '{orphan}'."))
+
+    def retry_load(self):
+        self.retry_btn.pack_forget()
+        self.store.retry_load()
+
+    # Loading progress / finished
+    def on_load_event(self, event, _, value):
+        buttons = (self.add_btn, self.edit_btn, self.delete_btn, self.import_btn)
+        if event == "progress":
+            self.retry_btn.pack_forget()
+            self.load_frame.pack(anchor="w", before=self.recipe_list)
+            self.load_bar["value"] = value * 100
+            self.load_label.config(text=f"Loading recipes... {value:.0%} ({len(self.repo)} loaded)")
+            for b in buttons:
+                b.config(state="disabled")
+        elif value is None:
+            self.load_frame.pack_forget()
+            for b in buttons:
+                b.config(state="normal")
+            self.warn_orphaned_journal()
+        else:
+            self.load_label.config(text="Could not load all recipes, changes are not saved.")
+            self.retry_btn.pack(side="left")
+            messagebox.showerror("Error", f"Failed to read recipes: {value}")
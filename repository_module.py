@@ -0,0 +1,184 @@
+from model_module import compact_recipe, as_dict
+
+# =====================================================
+# Name key used by every index (case-insensitive)
+# =====================================================
+def name_key(name):
+    return name.strip().casefold()
+
+# =====================================================
+# Change events
+# -----------------------------------------------------
+# Views subscribe(callback) to hear about changes;
+# callback(event, item_id, item) is called with event
+# "add", "update" or "delete".
+# =====================================================
+class Observable:
+    def __init__(self):
+        self._listeners = []
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        self._listeners.remove(callback)
+
+    def notify(self, event, item_id, item):
+        for callback in list(self._listeners):
+            callback(event, item_id, item)
+
+# =====================================================
+# Recipe Repository
+# -----------------------------------------------------
+# Recipes are stored by a stable integer id, with a
+# case-folded name index beside them, so lookups,
+# duplicate checks, updates and deletes are all O(1).
+# Ids never get reused, and iteration keeps the order
+# the recipes were added in.
+#
+# Recipes are kept as compact read-only records (see
+# model_module) that behave like the dicts they were
+# made from. Callers still pass in plain dicts.
+# =====================================================
+class RecipeRepository(Observable):
+    def __init__(self, recipes=None):
+        super().__init__()
+        self._last_id = 0
+        self._recipes = {}      # id -> recipe dict
+        self._name_index = {}   # name key -> id
+
+        for recipe in recipes or []:
+            self.put(recipe)
+
+    def __len__(self):
+        return len(self._recipes)
+
+    def __iter__(self):
+        return iter(self._recipes.values())
+
+    def __contains__(self, name):
+        return self.find(name) is not None
+
+    def ids(self):
+        return list(self._recipes)
+
+    def items(self):
+        return self._recipes.items()
+
+    def get(self, recipe_id):
+        return self._recipes.get(recipe_id)
+
+    def find(self, name):
+        return self._name_index.get(name_key(name))
+
+    def get_by_name(self, name):
+        rid = self.find(name)
+        return None if rid is None else self.get(rid)
+
+    # True if another recipe (not exclude_id) already uses this name
+    def name_taken(self, name, exclude_id=None):
+        rid = self.find(name)
+        return rid is not None and rid != exclude_id
+
+    # ================== Changes ====================
+    def add(self, recipe):
+        key = name_key(recipe["name"])
+        if key in self._name_index:
+            raise ValueError(f"Recipe '{recipe['name']}' already exists.")
+
+        recipe = compact_recipe(recipe)
+        self._last_id += 1
+        rid = self._last_id
+        self._recipes[rid] = recipe
+        self._name_index[key] = rid
+        self.notify("add", rid, recipe)
+        return rid
+
+    # Add, or replace the recipe with the same name (a hand-edited file may repeat a name, the last one wins)
+    def put(self, recipe):
+        rid = self.find(recipe.get("name", ""))
+        if rid is None:
+            return self.add(recipe)
+        self.update(rid, recipe)
+        return rid
+
+    def update(self, recipe_id, recipe):
+        old = self._recipes[recipe_id]
+        new_key = name_key(recipe["name"])
+        if self.name_taken(recipe["name"], exclude_id=recipe_id):
+            raise ValueError(f"Recipe '{recipe['name']}' already exists.")
+
+        recipe = compact_recipe(recipe)
+        del self._name_index[name_key(old["name"])]
+        self._name_index[new_key] = recipe_id
+        self._recipes[recipe_id] = recipe
+        self.notify("update", recipe_id, recipe)
+        return old
+
+    def delete(self, recipe_id):
+        recipe = self._recipes.pop(recipe_id)
+        del self._name_index[name_key(recipe["name"])]
+        self.notify("delete", recipe_id, recipe)
+        return recipe
+
+    # Plain dicts, ready for json.dump
+    def to_list(self):
+        return [as_dict(recipe) for recipe in self._recipes.values()]
+
+    # Shallow copy: the recipes are shared, they are replaced on update, never changed in place
+    def copy(self):
+        other = RecipeRepository()
+        other._last_id = self._last_id
+        other._recipes = dict(self._recipes)
+        other._name_index = dict(self._name_index)
+        return other
+
+# =====================================================
+# Substitute Repository
+# -----------------------------------------------------
+# Same idea for substitutes.json: a case-folded key
+# index plus a category index built once at load.
+# Events use the name key as the item id.
+# =====================================================
+class SubstituteRepository(Observable):
+    def __init__(self, subs=None):
+        super().__init__()
+        self._subs = {}         # name key -> {"name", "category", "subs"}
+        self._categories = {}   # category -> [ingredient names]
+
+        for ing, data in (subs or {}).items():
+            self.add(ing, data)
+
+    def __len__(self):
+        return len(self._subs)
+
+    def __contains__(self, name):
+        return name_key(name) in self._subs
+
+    def add(self, ing, data):
+        key = name_key(ing)
+        cat = data.get("category", "Others")
+        old = self._subs.get(key)
+        if old is None or old["category"] != cat:
+            if old is not None:
+                self._categories[old["category"]].remove(old["name"])
+            self._categories.setdefault(cat, []).append(ing)
+        event = "add" if old is None else "update"
+        self._subs[key] = {"name": ing, "category": cat, "subs": list(data.get("subs", []))}
+        self.notify(event, key, self._subs[key])
+
+    def get(self, name):
+        return self._subs.get(name_key(name))
+
+    def substitutes_for(self, name):
+        entry = self.get(name)
+        return [] if entry is None else entry["subs"]
+
+    def categories(self):
+        return self._categories
+
+    def ingredients_in(self, category):
+        return self._categories.get(category, [])
+
+    def names(self):
+        return [entry["name"] for entry in self._subs.values()]
@@ -0,0 +1,223 @@
+from bisect import bisect_left
+from collections import Counter
+import heapq, re
+from repository_module import name_key
+
+# =====================================================
+# Search Index (typeahead + fuzzy)
+# -----------------------------------------------------
+# Prefix part: every term is stored under each of its
+# word starts ("almond milk" under "almond milk" and
+# "milk") in one sorted list. That list works as a
+# flattened prefix trie: all keys with a prefix sit next
+# to each other, so bisect finds them in O(log n) and a
+# query only walks the matches it returns.
+#
+# Fuzzy part: a trigram index (trigram -> term ids) used
+# when the prefix part finds too little, e.g. for typos.
+# Candidates sharing the most trigrams are checked with
+# a bounded edit distance and ranked by it.
+#
+# add(term) may be called any time; a term already in
+# the index is skipped. New prefix keys are appended and the list is re-sorted
+# on the next query, so loading many terms stays O(n log n).
+# =====================================================
+MAX_FUZZY_DISTANCE = 2
+COMMON_GRAM = 2000      # trigrams in more terms than this are too common to help
+
+class SearchIndex:
+    def __init__(self):
+        self.terms = []         # term id -> term as given
+        self.term_ids = {}      # name key -> term id
+        self.prefix_keys = []   # sorted (key, term id)
+        self.unsorted = False
+        self.grams = {}         # trigram -> [term id, ...]
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add(self, term):
+        key = name_key(term)
+        if not key or key in self.term_ids:
+            return
+        tid = len(self.terms)
+        self.term_ids[key] = tid
+        self.terms.append(term)
+        words = key.split()
+        for i in range(len(words)):
+            self.prefix_keys.append((" ".join(words[i:]), tid))
+        self.unsorted = True
+        for gram in trigrams(key):
+            self.grams.setdefault(gram, []).append(tid)
+
+    # ================== Queries ====================
+    def prefix_search(self, query, limit=10):
+        query = name_key(query)
+        if self.unsorted:
+            self.prefix_keys.sort()
+            self.unsorted = False
+        found, seen = [], set()
+        pos = bisect_left(self.prefix_keys, (query, -1))
+        while pos < len(self.prefix_keys) and len(found) < limit:
+            key, tid = self.prefix_keys[pos]
+            if not key.startswith(query):
+                break
+            if tid not in seen:
+                seen.add(tid)
+                found.append(tid)
+            pos += 1
+        # whole-term matches before matches on a later word
+        found.sort(key=lambda t: (not name_key(self.terms[t]).startswith(query), name_key(self.terms[t])))
+        return found
+
+    def fuzzy_search(self, query, limit=10):
+        query = name_key(query)
+        counts = Counter()
+        for gram in trigrams(query):
+            ids = self.grams.get(gram, ())
+            if len(ids) <= COMMON_GRAM:
+                counts.update(ids)
+
+        # check the best trigram overlaps with a real edit distance
+        candidates = heapq.nlargest(limit * 2, counts, key=counts.__getitem__)
+        scored = []
+        for tid in candidates:
+            key = name_key(self.terms[tid])
+            # compare against the start of each word so "chese" finds "cheddar cheese"
+            dist = min(edit_distance(query, key[i:i + len(query) + MAX_FUZZY_DISTANCE], MAX_FUZZY_DISTANCE)
+                       for i in word_starts(key))
+            if dist <= MAX_FUZZY_DISTANCE:
+                scored.append((dist, -counts[tid], key, tid))
+        scored.sort()
+        return [tid for _, _, _, tid in scored[:limit]]
+
+    # Typeahead: prefix matches first, topped up with fuzzy ones
+    def search(self, query, limit=10):
+        if not name_key(query):
+            return []
+        found = self.prefix_search(query, limit)
+        if len(found) < limit and len(name_key(query)) >= 3:
+            for tid in self.fuzzy_search(query, limit):
+                if tid not in found:
+                    found.append(tid)
+                    if len(found) == limit:
+                        break
+        return [self.terms[tid] for tid in found]
+
+# =====================================================
+# Recipe Search Index (Recipes page search box)
+# -----------------------------------------------------
+# Inverted index from word to recipe ids over recipe
+# names and ingredient names. Every query word is taken
+# as a prefix: the words starting with it sit next to
+# each other in the sorted vocab list, their recipe sets
+# are joined, and the sets of all query words are
+# intersected smallest first. A keystroke only touches
+# the words and recipes that match.
+#
+# Kept current from recipe events; a word whose last
+# recipe goes away is dropped from the vocab.
+# =====================================================
+WORD = re.compile(r"\w+")
+
+class RecipeSearchIndex:
+    def __init__(self, repo):
+        self.postings = {}      # word -> set of recipe ids
+        self.words_of = {}      # recipe id -> set of words
+        self.vocab = []         # sorted words
+        self.unsorted = False
+
+        for rid, recipe in repo.items():
+            self.add_recipe(rid, recipe)
+        repo.subscribe(self.on_repo_change)
+
+    @staticmethod
+    def recipe_words(recipe):
+        text = " ".join([recipe.get("name", "")] + [ing.get("name", "") for ing in recipe.get("ingredients", [])])
+        return set(words(text))
+
+    def add_recipe(self, rid, recipe):
+        found = self.recipe_words(recipe)
+        self.words_of[rid] = found
+        for word in found:
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = set()
+                self.vocab.append(word)
+                self.unsorted = True
+            ids.add(rid)
+
+    def remove_recipe(self, rid):
+        for word in self.words_of.pop(rid, ()):
+            ids = self.postings[word]
+            ids.discard(rid)
+            if not ids:
+                del self.postings[word]
+                self.sort_vocab()
+                del self.vocab[bisect_left(self.vocab, word)]
+
+    def on_repo_change(self, event, rid, recipe):
+        self.remove_recipe(rid)
+        if event != "delete":
+            self.add_recipe(rid, recipe)
+
+    def sort_vocab(self):
+        if self.unsorted:
+            self.vocab.sort()
+            self.unsorted = False
+
+    # ================== Queries ====================
+    # Recipe ids matching every word of query (as prefixes), None for an empty query
+    def search(self, query):
+        prefixes = sorted(set(words(query)))
+        if not prefixes:
+            return None
+        self.sort_vocab()
+        matches = []
+        for prefix in prefixes:
+            ids = set()
+            pos = bisect_left(self.vocab, prefix)
+            while pos < len(self.vocab) and self.vocab[pos].startswith(prefix):
+                ids |= self.postings[self.vocab[pos]]
+                pos += 1
+            if not ids:
+                return set()
+            matches.append(ids)
+        matches.sort(key=len)
+        return matches[0].intersection(*matches[1:])
+
+# =====================================================
+# Helpers
+# =====================================================
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def words(text):
+    return WORD.findall(text.casefold())
+
+def word_starts(text):
+    return [0] + [i + 1 for i, c in enumerate(text) if c == " "]
+
+# Levenshtein distance, only the band |i - j| <= limit is computed
+# and it gives up (returns limit + 1) once it must exceed limit
+def edit_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    far = limit + 1
+    prev = [j if j <= limit else far for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        cur = [far] * (len(b) + 1)
+        cur[0] = i if i <= limit else far
+        ca = a[i - 1]
+        best = cur[0]
+        for j in range(lo, hi + 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != b[j - 1]))
+            cur[j] = d
+            if d < best:
+                best = d
+        if best > limit:
+            return far
+        prev = cur
+    return min(prev[-1], far)
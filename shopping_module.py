@@ -1,13 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json, os
+from widgets_module import VirtualChecklist, DetailWindow
+from aggregate_module import IngredientAggregator
+from planner_module import MealPlanner
 
 # =====================================================
 # Global UI constants
 # =====================================================
 BG_LIGHT = "#F7F9FC"
 PRIMARY = "#6F82EF"
-RECIPE_FILE = "recipes.json"
 
 # =====================================================
 # Reusable modern-style button
@@ -21,34 +22,14 @@ def modern_button(parent, text, command, width=16):
     btn.bind("<Leave>", lambda e: btn.config(bg=PRIMARY))
     return btn
 
-# =====================================================
-# ScrollableFrame
-# =====================================================
-class ScrollableFrame(ttk.Frame):
-    def __init__(self, container, width=200, height=200, *args, **kwargs):
-        super().__init__(container, *args, **kwargs)
-
-        canvas = tk.Canvas(self, bg=BG_LIGHT, highlightthickness=0,
-                           width=width, height=height)
-        scrollbar = ttk.Scrollbar(self, orient="vertical", command=canvas.yview)
-        self.scrollable_frame = ttk.Frame(canvas)
-
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-
-        canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
 # =====================================================
 # Shopping Page
 # =====================================================
 class ShoppingPage(tk.Frame):
-    def __init__(self, parent):
+    def __init__(self, parent, store):
         super().__init__(parent, bg=BG_LIGHT)
+        self.store = store
+        self.repo = store.recipes
 
         tk.Label(self, text="Shopping List Generator", bg=BG_LIGHT,
                  fg=PRIMARY, font=("Segoe UI", 22, "bold")).pack(pady=15)
@@ -64,20 +45,41 @@ class ShoppingPage(tk.Frame):
                  font=("Segoe UI", 14, "bold"),
                  bg=BG_LIGHT, fg="#2C3E50").pack(anchor="w", pady=5)
 
-        scroll_left = ScrollableFrame(left_frame, width=220, height=300)
-        scroll_left.pack()
-
-        self.recipe_vars = {}
-        self.load_recipes()
-
-        for recipe in self.recipes:
-            var = tk.BooleanVar()
-            ttk.Checkbutton(scroll_left.scrollable_frame,
-                            text=recipe["name"], variable=var).pack(anchor="w")
-            self.recipe_vars[recipe["name"]] = var
+        # one canvas, only visible rows are drawn (see widgets_module)
+        self.aggregator = IngredientAggregator(self.repo)
+        self.aggregator.on_change = self.update_ingredient_rows
+        self.recipe_checklist = VirtualChecklist(left_frame, width=220, height=300,
+                                                 label=lambda rid: self.repo.get(rid)["name"],
+                                                 on_toggle=self.toggle_recipe)
+        self.recipe_checklist.pack()
+        self.recipe_checklist.set_items(self.repo.ids())
+        self.store.subscribe("recipes", self.on_repo_change)
 
         modern_button(left_frame, "Select Recipes",
-                      self.select_recipes, 16).pack(pady=15)
+                      self.select_recipes, 16).pack(pady=(15, 10))
+
+        # Meal planner: ticks n recipes within a calorie band, fewest ingredients first
+        plan_row = tk.Frame(left_frame, bg=BG_LIGHT)
+        plan_row.pack(anchor="w")
+        self.plan_count = tk.IntVar(value=3)
+        ttk.Spinbox(plan_row, from_=1, to=21, width=3, textvariable=self.plan_count, state="readonly").pack(side="left")
+        tk.Label(plan_row, text="meals,", font=("Segoe UI", 10), bg=BG_LIGHT).pack(side="left", padx=(3, 3))
+        self.plan_lo = ttk.Entry(plan_row, width=6, font=("Segoe UI", 10))
+        self.plan_lo.insert(0, "1800")
+        self.plan_lo.pack(side="left")
+        tk.Label(plan_row, text="to", font=("Segoe UI", 10), bg=BG_LIGHT).pack(side="left", padx=3)
+        self.plan_hi = ttk.Entry(plan_row, width=6, font=("Segoe UI", 10))
+        self.plan_hi.insert(0, "2200")
+        self.plan_hi.pack(side="left")
+        tk.Label(plan_row, text="kcal", font=("Segoe UI", 10), bg=BG_LIGHT).pack(side="left", padx=(3, 0))
+        modern_button(left_frame, "Plan Meals", self.plan_meals, 16).pack(pady=(8, 0))
+        self.plan_label = tk.Label(left_frame, text="", font=("Segoe UI", 9, "italic"),
+                                   bg=BG_LIGHT, fg="#7F8C8D", wraplength=220, justify="left")
+        self.plan_label.pack(anchor="w", pady=(4, 0))
+        self.planner = None     # built on the first Plan Meals
+        self.plans = []
+        self.plan_args = None
+        self.plan_at = 0
 
         # Right panel
         right_frame = tk.Frame(main, bg=BG_LIGHT)
@@ -96,99 +98,123 @@ class ShoppingPage(tk.Frame):
                  font=("Segoe UI", 13, "bold"),
                  bg=BG_LIGHT, fg="#2C3E50").pack(anchor="w", pady=(10, 5))
 
-        scroll_ing = ScrollableFrame(right_frame, width=350, height=215)
-        scroll_ing.pack(fill="x", pady=5, anchor="n")
-
-        self.ing_frame = scroll_ing.scrollable_frame
-        self.ing_vars, self.combined_ings = {}, {}
+        # running totals of the ticked recipes, kept up to date by the aggregator
+        self.combined_ings = self.aggregator.totals
+        self.ticked = set()     # ingredient keys ticked as not yet bought, kept across changes
+        self.ing_checklist = VirtualChecklist(right_frame, width=350, height=215, order=str.lower,
+                                              label=lambda key: f"{key}: {self.combined_ings[key]}",
+                                              on_toggle=self.toggle_ingredient)
+        self.ing_checklist.pack(fill="x", pady=5, anchor="n")
 
         modern_button(right_frame, "Generate Shopping List",
                       self.generate_missing, width=23).pack(pady=20)
 
     # =====================================================
-    # Load recipes
+    # Recipes added / edited / deleted on the Recipes page
+    # (totals of a ticked recipe are fixed by the aggregator)
     # =====================================================
-    def load_recipes(self):
-        if os.path.exists(RECIPE_FILE):
-            try:
-                with open(RECIPE_FILE, "r", encoding="utf-8") as f:
-                    self.recipes = json.load(f)
-            except Exception:
-                self.recipes = []
+    def on_repo_change(self, event, rid, recipe):
+        self.plan_args = None   # plans found before the change are planned again
+        if event == "add":
+            self.recipe_checklist.insert_key(rid)
+        elif event == "update":
+            self.recipe_checklist.update_key(rid)
         else:
-            self.recipes = []
+            self.recipe_checklist.remove_key(rid)
 
     # =====================================================
     # Select recipes
     # =====================================================
     def select_recipes(self):
-        selected = [n for n, v in self.recipe_vars.items() if v.get()]
+        selected = self.recipe_checklist.checked_keys()
         if not selected:
             messagebox.showwarning("Warning", "Please select at least one recipe.")
             return
 
         self.selected_box.config(state="normal")
         self.selected_box.delete("1.0", "end")
-        for name in selected:
-            self.selected_box.insert("end", f"- {name}\n")
+        for rid in selected:
+            self.selected_box.insert("end", f"- {self.repo.get(rid)['name']}\n")
         self.selected_box.config(state="disabled")
 
-        self.build_ingredient_list(selected)
+    # =====================================================
+    # Merge ingredients (incremental)
+    # -----------------------------------------------------
+    # Ticking a recipe only adds or subtracts that recipe,
+    # and only the ingredient rows it touches are redrawn.
+    # =====================================================
+    def toggle_recipe(self, rid, checked):
+        if checked:
+            self.aggregator.select(rid)
+        else:
+            self.aggregator.deselect(rid)
+
+    def update_ingredient_rows(self, keys):
+        removed, inserted, updated = [], [], []
+        for key in keys:
+            if key not in self.combined_ings:
+                removed.append(key)
+            elif self.ing_checklist.position(key) is None:
+                inserted.append(key)
+            else:
+                updated.append(key)
+        self.ing_checklist.change_keys(removed, inserted, updated, checked=self.ticked.intersection(inserted))
+
+    def toggle_ingredient(self, key, checked):
+        if checked:
+            self.ticked.add(key)
+        else:
+            self.ticked.discard(key)
 
     # =====================================================
-    # Merge ingredients
+    # Meal planner
+    # -----------------------------------------------------
+    # Ticks the best plan's recipes like clicking them
+    # would. Pressing Plan Meals again with the same
+    # numbers shows the next best plan.
     # =====================================================
-    def build_ingredient_list(self, selected_recipes):
-        for w in self.ing_frame.winfo_children(): w.destroy()
-        self.ing_vars.clear()
-        self.combined_ings.clear()
-
-        for recipe in self.recipes:
-            if recipe["name"] not in selected_recipes: continue
-            for ing in recipe.get("ingredients", []):
-                name, unit = ing.get("name", "").strip(), ing.get("unit", "").strip()
-                try: qty = float(ing.get("qty", 0))
-                except Exception: qty = 0.0
-                key = f"{name} ({unit})"
-                self.combined_ings[key] = self.combined_ings.get(key, 0) + qty
-
-        for key in sorted(self.combined_ings, key=str.lower):
-            text = f"{key}: {self.combined_ings[key]}"
-            var = tk.BooleanVar()
-            ttk.Checkbutton(self.ing_frame,
-                            text=text, variable=var).pack(anchor="w", pady=2)
-            self.ing_vars[text] = var
+    def plan_meals(self):
+        try:
+            args = (int(self.plan_count.get()), float(self.plan_lo.get()), float(self.plan_hi.get()))
+        except ValueError:
+            return messagebox.showwarning("Warning", "Enter the number of meals and a calorie range, e.g. 3 meals, 1800 to 2200 kcal.")
+        count, lo, hi = args
+        if count < 1 or lo > hi:
+            return messagebox.showwarning("Warning", "Enter at least one meal and a calorie range from low to high.")
+
+        if args == self.plan_args and self.plans:
+            self.plan_at = (self.plan_at + 1) % len(self.plans)
+        else:
+            if self.planner is None:
+                self.planner = MealPlanner(self.repo, self.store.nutrition_index)
+            self.plans, _ = self.planner.plan(count, lo, hi)
+            self.plan_args, self.plan_at = args, 0
+        if not self.plans:
+            self.plan_args = None
+            self.plan_label.config(text="")
+            return messagebox.showinfo("Meal Planner", f"No plan of {count} different recipes adds up to {lo:g} - {hi:g} kcal.")
+
+        plan = self.plans[self.plan_at]
+        for rid in self.recipe_checklist.checked_keys():
+            self.recipe_checklist.set_checked(rid, False)
+            self.toggle_recipe(rid, False)
+        for rid in plan["recipes"]:
+            self.recipe_checklist.set_checked(rid, True)
+            self.toggle_recipe(rid, True)
+        self.select_recipes()
+        more = " (press again for the next)" if len(self.plans) > 1 else ""
+        self.plan_label.config(text=f"Plan {self.plan_at + 1} of {len(self.plans)}: {plan['total_cal']:g} kcal, "
+                                    f"{plan['ingredients']} ingredient{'s' if plan['ingredients'] != 1 else ''}{more}")
 
     # =====================================================
     # Generate shopping list
     # =====================================================
     def generate_missing(self):
-        missing = {}
-        for text, var in self.ing_vars.items():
-            if var.get():
-                parts = text.split(":")
-                missing[parts[0].strip()] = ":".join(parts[1:]).strip() if len(parts) >= 2 else ""
+        missing = {key: self.combined_ings[key] for key in self.ing_checklist.checked_keys()}
 
         if not missing:
             messagebox.showwarning("Warning", "No ingredients selected.")
             return
 
-        win = tk.Toplevel(self)
-        win.title("Missing Ingredients")
-        win.geometry("420x400")
-        win.config(bg=BG_LIGHT)
-        win.grab_set()
-
-        tk.Label(win, text="Missing Ingredients:",
-                 font=("Segoe UI", 18, "bold"),
-                 bg=BG_LIGHT).pack(pady=10)
-
-        box = tk.Text(win, width=45, height=10,
-                      font=("Segoe UI", 12))
-        box.pack(pady=5, padx=10, fill="both", expand=True)
-
-        for name, qty in missing.items():
-            box.insert("end", f"- {name}: {qty}\n")
-
-        box.config(state="disabled")
-        modern_button(win, "Close", win.destroy).pack(pady=10)
\ No newline at end of file
+        lines = [f"- {name}: {qty}" for name, qty in missing.items()]
+        DetailWindow.get(self, "shopping", "420x400").show("Missing Ingredients", "Missing Ingredients:", lines)
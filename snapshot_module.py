@@ -0,0 +1,302 @@
+import json, mmap, os, struct, sys, threading
+from array import array
+from repository_module import RecipeRepository, name_key
+from model_module import Recipe, NAMES, UNITS, compact_recipe, as_dict
+
+# =====================================================
+# Recipe Snapshot (recipes.json.snap)
+# -----------------------------------------------------
+# A binary copy of recipes.json laid out in columns, so
+# it can be memory-mapped and read recipe by recipe
+# instead of parsed all at once:
+#
+#   header   magic, stamp of recipes.json (size, mtime),
+#            recipe count, then (offset, length) of each
+#            section below
+#   kinds    uint8 per recipe: 0 compact with float total,
+#            1 compact with int total, 2 stored as JSON
+#   totals   float64 per recipe
+#   starts   int64, recipe i's ingredients are rows
+#            starts[i]..starts[i+1]
+#   text     int32 pairs per ingredient row: name id, unit id
+#   amounts  float64 pairs per row: qty, kcal
+#   names    recipe names (string table)
+#   raw      JSON text of recipes that are not compact
+#   by_name  int32 recipe numbers sorted by name key
+#   ingredient names / units (string tables)
+#
+# A string table is int64 offsets (count + 1) followed
+# by the UTF-8 text. Sections start on 8 byte bounds.
+#
+# The snapshot is only used while its stamp matches
+# recipes.json; the journal is replayed on top of it
+# exactly like on top of the JSON. JSON stays the file
+# to edit, share and back up; the snapshot is rebuilt
+# from it whenever it is stale.
+# =====================================================
+MAGIC = b"RCPSNAP1"
+HEADER = struct.Struct("<8sqqq")
+SECTIONS = ("kinds", "totals", "starts", "text", "amounts", "name_offsets", "name_text",
+            "raw_offsets", "raw_text", "by_name", "ing_offsets", "ing_text", "unit_offsets", "unit_text")
+SECTION = struct.Struct("<qq")
+
+COMPACT_FLOAT, COMPACT_INT, RAW = 0, 1, 2
+
+# ================== Writing ====================
+def string_table(strings):
+    blobs = [s.encode("utf-8") for s in strings]
+    offsets = array("q", [0])
+    for b in blobs:
+        offsets.append(offsets[-1] + len(b))
+    return offsets.tobytes(), b"".join(blobs)
+
+def write_snapshot(path, recipes, stamp):
+    kinds, totals, starts = bytearray(), array("d"), array("q", [0])
+    text, amounts, raw = array("i"), array("d"), []
+    for recipe in recipes:
+        if isinstance(recipe, Recipe):
+            kinds.append(COMPACT_INT if type(recipe.total_cal) is int else COMPACT_FLOAT)
+            totals.append(recipe.total_cal)
+            text.extend(recipe.text_ids)
+            amounts.extend(recipe.amounts)
+            raw.append("")
+        else:
+            kinds.append(RAW)
+            totals.append(0.0)
+            raw.append(json.dumps(recipe, ensure_ascii=False))
+        starts.append(len(amounts) // 2)
+
+    names = [recipe["name"] for recipe in recipes]
+    by_name = array("i", sorted(range(len(names)), key=lambda i: name_key(names[i])))
+    # ids in text point into the shared tables, taken after every recipe was made
+    ings, units = NAMES.strings[:len(NAMES)], UNITS.strings[:len(UNITS)]
+
+    sections = [bytes(kinds), totals.tobytes(), starts.tobytes(), text.tobytes(), amounts.tobytes(),
+                *string_table(names), *string_table(raw), by_name.tobytes(),
+                *string_table(ings), *string_table(units)]
+
+    offset = HEADER.size + SECTION.size * len(sections)
+    table, body = [], []
+    for data in sections:
+        pad = -offset % 8
+        body.append(b"\0" * pad)
+        offset += pad
+        table.append(SECTION.pack(offset, len(data)))
+        body.append(data)
+        offset += len(data)
+
+    # own temp name, several processes may write the same snapshot at once
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, stamp[0], stamp[1], len(names)))
+            f.write(b"".join(table))
+            for data in body:
+                f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+# ================== Reading ====================
+# Returns the Snapshot, or None if it is missing, stale or unreadable
+def open_snapshot(path, stamp):
+    if stamp is None or sys.byteorder != "little" or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return None
+            magic, size, mtime, count = HEADER.unpack(header)
+            if magic != MAGIC or [size, mtime] != stamp:
+                return None
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return Snapshot(mm, count)
+    except (OSError, ValueError, struct.error):
+        return None
+
+class Snapshot:
+    def __init__(self, mm, count):
+        self.mm = mm
+        self.count = count
+        view = memoryview(mm)
+        pos = HEADER.size
+        self.sections = {}
+        for name in SECTIONS:
+            offset, length = SECTION.unpack_from(mm, pos)
+            if offset + length > len(mm):
+                raise ValueError("Truncated snapshot")
+            self.sections[name] = (offset, length)
+            pos += SECTION.size
+
+        def column(name, fmt):
+            offset, length = self.sections[name]
+            return view[offset:offset + length].cast(fmt)
+
+        self.kinds = column("kinds", "B")
+        self.totals = column("totals", "d")
+        self.starts = column("starts", "q")
+        self.text = column("text", "i")
+        self.name_offsets = column("name_offsets", "q")
+        self.raw_offsets = column("raw_offsets", "q")
+        self.by_name = column("by_name", "i")
+        self.ing_offsets = column("ing_offsets", "q")
+        self.unit_offsets = column("unit_offsets", "q")
+        self.amounts_at = self.sections["amounts"][0]
+
+        # snapshot ingredient / unit ids -> ids in the shared tables, filled in as used
+        self.ing_map = [-1] * (len(self.ing_offsets) - 1)
+        self.unit_map = [-1] * (len(self.unit_offsets) - 1)
+
+    def __len__(self):
+        return self.count
+
+    def string(self, table, offsets, i):
+        start = self.sections[table][0]
+        return self.mm[start + offsets[i]:start + offsets[i + 1]].decode("utf-8")
+
+    def name(self, i):
+        return self.string("name_text", self.name_offsets, i)
+
+    def shared_id(self, i, mapping, table, offsets, shared):
+        sid = mapping[i]
+        if sid < 0:
+            sid = mapping[i] = shared.intern(self.string(table, offsets, i))
+        return sid
+
+    # Recipe number i (0-based) as a Recipe record (or dict)
+    def recipe(self, i):
+        kind = self.kinds[i]
+        if kind == RAW:
+            return compact_recipe(json.loads(self.string("raw_text", self.raw_offsets, i)))
+
+        start, end = self.starts[i], self.starts[i + 1]
+        text_ids = array("i")
+        for row in range(start, end):
+            text_ids.append(self.shared_id(self.text[2 * row], self.ing_map, "ing_text", self.ing_offsets, NAMES))
+            text_ids.append(self.shared_id(self.text[2 * row + 1], self.unit_map, "unit_text", self.unit_offsets, UNITS))
+        amounts = array("d")
+        amounts.frombytes(self.mm[self.amounts_at + 16 * start:self.amounts_at + 16 * end])
+        total = self.totals[i]
+        return Recipe(self.name(i), int(total) if kind == COMPACT_INT else total, text_ids, amounts)
+
+    # Recipe number with this name key, binary search over by_name
+    def find(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if name_key(self.name(self.by_name[mid])) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and name_key(self.name(self.by_name[lo])) == key:
+            return self.by_name[lo]
+        return None
+
+# =====================================================
+# Snapshot Repository
+# -----------------------------------------------------
+# A RecipeRepository over an open snapshot. Recipe i of
+# the snapshot has id i + 1 and is read from the map
+# when asked for; only recipes added or changed since
+# are held in _recipes, deleted snapshot ids in _removed.
+# Name lookups check the changed names first, then the
+# snapshot's sorted name column.
+# =====================================================
+class SnapshotRepository(RecipeRepository):
+    def __init__(self, snapshot):
+        super().__init__()
+        self.snapshot = snapshot
+        self.base = len(snapshot)
+        self._last_id = self.base
+        self._removed = set()
+        self._added = 0         # ids above base in _recipes
+
+    def __len__(self):
+        return self.base - len(self._removed) + self._added
+
+    def __iter__(self):
+        return (recipe for _, recipe in self.items())
+
+    def ids(self):
+        if self._removed:
+            ids = [rid for rid in range(1, self.base + 1) if rid not in self._removed]
+        else:
+            ids = list(range(1, self.base + 1))
+        ids.extend(rid for rid in self._recipes if rid > self.base)
+        return ids
+
+    def items(self):
+        return ((rid, self.get(rid)) for rid in self.ids())
+
+    def get(self, recipe_id):
+        recipe = self._recipes.get(recipe_id)
+        if recipe is None and 0 < recipe_id <= self.base and recipe_id not in self._removed:
+            recipe = self.snapshot.recipe(recipe_id - 1)
+        return recipe
+
+    def find(self, name):
+        key = name_key(name)
+        rid = self._name_index.get(key)
+        if rid is not None:
+            return rid
+        i = self.snapshot.find(key)
+        # a snapshot recipe that was renamed or deleted no longer answers to its old name
+        if i is None or i + 1 in self._removed or i + 1 in self._recipes:
+            return None
+        return i + 1
+
+    # ================== Changes ====================
+    def add(self, recipe):
+        if self.find(recipe["name"]) is not None:
+            raise ValueError(f"Recipe '{recipe['name']}' already exists.")
+
+        recipe = compact_recipe(recipe)
+        self._last_id += 1
+        rid = self._last_id
+        self._recipes[rid] = recipe
+        self._name_index[name_key(recipe["name"])] = rid
+        self._added += 1
+        self.notify("add", rid, recipe)
+        return rid
+
+    def update(self, recipe_id, recipe):
+        old = self.get(recipe_id)
+        if old is None:
+            raise KeyError(recipe_id)
+        if self.name_taken(recipe["name"], exclude_id=recipe_id):
+            raise ValueError(f"Recipe '{recipe['name']}' already exists.")
+
+        recipe = compact_recipe(recipe)
+        self._name_index.pop(name_key(old["name"]), None)
+        self._name_index[name_key(recipe["name"])] = recipe_id
+        self._recipes[recipe_id] = recipe
+        self.notify("update", recipe_id, recipe)
+        return old
+
+    def delete(self, recipe_id):
+        recipe = self.get(recipe_id)
+        if recipe is None:
+            raise KeyError(recipe_id)
+        self._recipes.pop(recipe_id, None)
+        if recipe_id <= self.base:
+            self._removed.add(recipe_id)
+        else:
+            self._added -= 1
+        self._name_index.pop(name_key(recipe["name"]), None)
+        self.notify("delete", recipe_id, recipe)
+        return recipe
+
+    def to_list(self):
+        return [as_dict(recipe) for recipe in self]
+
+    def copy(self):
+        other = SnapshotRepository(self.snapshot)
+        other._last_id = self._last_id
+        other._recipes = dict(self._recipes)
+        other._name_index = dict(self._name_index)
+        other._removed = set(self._removed)
+        other._added = self._added
+        return other
@@ -0,0 +1,609 @@
+import collections, json, os, queue, threading, time, uuid
+from repository_module import RecipeRepository, name_key
+from loader_module import JsonArrayReader
+from model_module import as_dict
+from snapshot_module import SnapshotRepository, open_snapshot, write_snapshot
+from filelock_module import FileLock
+
+# =====================================================
+# Recipe Storage
+# -----------------------------------------------------
+# recipes.json stays the main file, but single changes
+# are no longer written by rewriting it. Each add, edit
+# or delete is appended as one line to a change journal
+# (recipes.json.journal) and fsynced, so a save only
+# costs the size of the changed recipe.
+#
+# Every COMPACT_EVERY changes, and when the app closes
+# (close()), the journal is folded back into
+# recipes.json. The new file is written to a temp
+# file first and swapped in with os.replace, so a crash
+# leaves either the old or the new file, never half of one.
+#
+# The first journal line stores the size and mtime of
+# the recipes.json it was started on. If they no longer
+# match (recipes.json was edited, copied or restored by
+# hand, or a crash came between the swap and the new
+# journal) the journal is not applied. It is moved aside
+# to recipes.json.journal.orphan (orphaned is set, for a
+# warning) so those changes are not lost.
+#
+# The storage keeps its own copy of the repository so
+# it can compact from a worker thread (BackgroundWriter)
+# while the page keeps changing its copy.
+#
+# load() reads everything at once; load_in_chunks() is
+# the streaming version used by the background loader.
+# read() is the read-only version for scripts and the
+# batch tool: no lock, nothing written or repaired.
+# When recipes.json.snap matches recipes.json, load()
+# maps it instead of parsing the JSON (snapshot_module);
+# after a JSON load or a compaction the snapshot is
+# written again.
+# Until either has finished, ready is not set and the
+# background writer waits. If loading failed nothing is
+# ever written, so a bad read cannot wipe the file.
+#
+# Several windows (or terminals sharing the folder) can
+# use the same recipes.json:
+# - reading, appending and compacting happen under a
+#   file lock (recipes.json.lock, see filelock_module)
+# - every journal line gets a running "seq" and the
+#   "by" id of the window that wrote it; each window
+#   follows the journal with a JournalTail and applies
+#   the lines the others wrote (DataStore.sync)
+# - compaction keeps the folded journal as .journal.old
+#   and starts the new one at the same seq, so a window
+#   that had not read it all yet can finish it
+# - a change carries the "base" seq its window had seen;
+#   if another window changed the same recipe after
+#   that, append() drops it instead of overwriting
+# =====================================================
+COMPACT_EVERY = 1000
+LOAD_BATCH = 200
+RECENT = 10000      # journal lines remembered for the conflict check
+
+class RecipeStorage:
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.old_journal_path = path + ".journal.old"
+        self.snapshot_path = path + ".snap"
+        self.snapshot = None
+        self.repo = None
+        self.pending = 0    # journal entries not yet compacted
+        self.ready = threading.Event()
+        self.failed = False
+        self.lock = FileLock(path + ".lock")
+        self.instance = uuid.uuid4().hex[:12]   # "by" of the lines this window writes
+        self.tail = JournalTail(self.journal_path)
+        self.loaded_tail = None     # the tail as it was when loading finished
+        self.recent = collections.deque(maxlen=RECENT)  # (seq, by, name keys)
+        self.orphaned = None    # where a journal that no longer matched was moved
+        self.snapshot_thread = None
+
+    # ================== Load ====================
+    # background_snapshot=False writes a stale snapshot before returning
+    def load(self, background_snapshot=True):
+        try:
+            with self.lock:
+                stamp = self.base_stamp()
+                if self.open_snapshot():
+                    self.repo = SnapshotRepository(self.snapshot)
+                elif os.path.exists(self.path):
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self.repo = RecipeRepository(json.load(f))
+                    if background_snapshot:
+                        self.save_snapshot_in_background(list(self.repo), stamp)
+                    else:
+                        self.save_snapshot(list(self.repo), stamp)
+                else:
+                    self.repo = RecipeRepository()
+                self.pending = len(self.replay_journal())
+        except Exception:
+            self.failed = True
+            raise
+        finally:
+            self.ready.set()
+        return self.repo.copy()
+
+    # Start over from the files, for a copy that missed journal lines
+    # another window has already folded into recipes.json
+    def reload(self):
+        self.snapshot = None
+        self.recent.clear()
+        self.load()
+
+    # The repository as the files have it, without touching them: no lock,
+    # no snapshot written, a stale journal or a torn last line is skipped
+    # but left in place. Read again if a compaction swapped recipes.json
+    # in the meantime.
+    def read(self):
+        while True:
+            stamp = self.base_stamp()
+            snapshot = open_snapshot(self.snapshot_path, stamp)
+            if snapshot is not None:
+                repo = SnapshotRepository(snapshot)
+            elif stamp is not None:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    repo = RecipeRepository(json.load(f))
+            else:
+                repo = RecipeRepository()
+            entries = self.read_journal(stamp)
+            if entries is not None and self.base_stamp() == stamp:
+                break
+        for entry in entries:
+            apply_change(repo, entry)
+        return repo
+
+    # Complete journal lines written on top of the recipes.json with this stamp
+    # ([] if there are none or the journal is stale, None if it changed generation)
+    def read_journal(self, stamp):
+        tail = JournalTail(self.journal_path)
+        try:
+            with open(self.journal_path, "rb") as f:
+                first = f.readline()
+        except FileNotFoundError:
+            return []
+        header = read_entry(first)
+        if header is None or header.get("base") != stamp:
+            return []
+        tail.start(first, header.get("seq", 0))
+        return tail.read()
+
+    # Yields ("recipes", [recipe, ...], progress) batches and then
+    # ("changes", [journal entry, ...], 1.0) for the journal replayed on top
+    def load_in_chunks(self):
+        self.failed = False     # again, for a retry after a failed load
+        try:
+            with self.lock:
+                self.repo = RecipeRepository()
+                stamp = self.base_stamp()
+                if os.path.exists(self.path):
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        reader = JsonArrayReader(f)
+                        batch = []
+                        for recipe in reader:
+                            # pass on the compact record so both copies share it
+                            batch.append(self.repo.get(self.repo.put(recipe)))
+                            if len(batch) == LOAD_BATCH:
+                                yield "recipes", batch, reader.progress
+                                batch = []
+                        if batch:
+                            yield "recipes", batch, 1.0
+                    self.save_snapshot_in_background(list(self.repo), stamp)
+
+                changes = self.replay_journal()
+                self.pending = len(changes)
+            if changes:
+                yield "changes", changes, 1.0
+        except Exception:
+            self.failed = True
+            raise
+        finally:
+            self.ready.set()
+
+    # ================== Snapshot ====================
+    # Maps the snapshot if it matches recipes.json, True if it did
+    def open_snapshot(self):
+        if self.snapshot is None:
+            self.snapshot = open_snapshot(self.snapshot_path, self.base_stamp())
+        return self.snapshot is not None
+
+    # recipes: the recipes exactly as in the recipes.json with this stamp
+    def save_snapshot(self, recipes, stamp):
+        try:
+            write_snapshot(self.snapshot_path, recipes, stamp)
+        except OSError:
+            pass    # only a speed-up, the JSON is read next time (also fails on Windows while it is mapped)
+
+    # Not a daemon thread: the interpreter waits for it at exit instead of
+    # killing it halfway through the temp file (close() also joins it)
+    def save_snapshot_in_background(self, recipes, stamp):
+        self.snapshot_thread = threading.Thread(target=self.save_snapshot, args=(recipes, stamp), name="recipe-snapshot")
+        self.snapshot_thread.start()
+
+    def base_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    # Applies the journal to self.repo and returns the entries applied (lock held)
+    def replay_journal(self):
+        self.tail = JournalTail(self.journal_path)
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                first = f.readline()
+            header = read_entry(first)
+            if header is None or header.get("base") != self.base_stamp():
+                self.set_journal_aside()
+            else:
+                self.tail.start(first, header.get("seq", 0))
+
+        entries = self.tail.read() or []
+        self.drop_torn_tail()
+        for entry in entries:
+            apply_change(self.repo, entry)
+        self.loaded_tail = self.tail.copy()
+        return entries
+
+    # Moves a journal that does not belong to this recipes.json out of the
+    # way, next to any earlier ones (lock held)
+    def set_journal_aside(self):
+        path, n = self.journal_path + ".orphan", 1
+        while os.path.exists(path):
+            path, n = f"{self.journal_path}.orphan{n}", n + 1
+        replace_file(self.journal_path, path)
+        self.orphaned = path
+
+    # A line cut short by a crash, so the next append starts on a clean
+    # line (only under the lock: then nobody else is halfway through one)
+    def drop_torn_tail(self):
+        if self.tail.header is not None and self.tail.pos < os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(self.tail.pos)
+
+    # ================== Record Changes ====================
+    # entries: {"op": "add", "recipe"}, {"op": "update", "name", "recipe"}
+    # or {"op": "delete", "name"}, where name is the name before the change,
+    # optionally with "base": the seq the window had seen when it was made.
+    # Returns the entries dropped because another window got there first.
+    def append(self, *entries):
+        if self.failed:
+            raise OSError(f"'{self.path}' could not be read, changes are not saved.")
+        accepted, rejected = [], []
+        with self.lock:
+            self.catch_up()
+            for e in entries:
+                (rejected if self.conflicts(e) else accepted).append(e)
+            if accepted:
+                lines = []
+                if not os.path.exists(self.journal_path):
+                    lines.append(json.dumps({"base": self.base_stamp(), "seq": self.tail.seq}) + "\n")
+                for seq, e in enumerate(accepted, self.tail.seq + 1):
+                    lines.append(json.dumps(dict(e, seq=seq, by=self.instance), ensure_ascii=False) + "\n")
+
+                with open(self.journal_path, "a", encoding="utf-8", newline="\n") as f:
+                    f.write("".join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.catch_up()     # our own lines
+
+            if self.pending >= COMPACT_EVERY:
+                try:
+                    self.compact()
+                except OSError:
+                    pass    # the changes are safe in the journal, folded on a later save
+        return rejected
+
+    # Applies journal lines this copy has not seen yet, from any window (lock held)
+    def catch_up(self):
+        entries = self.tail.read()
+        if entries is None or (self.tail.header is not None and self.tail.base != self.base_stamp()):
+            # missed lines, or a compaction that swapped recipes.json but
+            # could not start the new journal: recipes.json has it all
+            return self.reload()
+        for entry in entries:
+            apply_change(self.repo, entry)
+            self.recent.append((entry["seq"], entry.get("by"), touched_names(entry)))
+        self.pending += len(entries)
+        self.drop_torn_tail()
+
+    # True if another window changed one of entry's recipes after entry's base
+    def conflicts(self, entry):
+        base = entry.get("base")
+        if base is None:
+            return False
+        names = touched_names(entry)
+        for seq, by, keys in reversed(self.recent):
+            if seq <= base:
+                break
+            if by != self.instance and not names.isdisjoint(keys):
+                return True
+        return False
+
+    # ================== Compaction ====================
+    def compact(self):
+        with self.lock:
+            self.catch_up()
+            recipes = list(self.repo)
+            write_json_atomic(self.path, [as_dict(recipe) for recipe in recipes])
+            stamp = self.base_stamp()
+            self.rotate_journal(stamp)
+            self.pending = 0
+        self.save_snapshot(recipes, stamp)
+
+    # Folds what is left in the journal into recipes.json (on exit), so the
+    # file people edit, copy and back up has every saved change
+    def close(self):
+        if self.snapshot_thread is not None:
+            self.snapshot_thread.join()
+        if self.repo is None or self.failed:
+            return
+        try:
+            with self.lock:
+                self.catch_up()
+                if self.pending:
+                    self.compact()
+        except OSError:
+            pass    # still safe in the journal, folded next time
+
+    # New, empty journal for the new recipes.json, continuing the seq.
+    # The folded one is kept as .journal.old for windows still reading it.
+    def rotate_journal(self, stamp):
+        header = json.dumps({"base": stamp, "seq": self.tail.seq}) + "\n"
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(self.journal_path):
+            replace_file(self.journal_path, self.old_journal_path)
+        replace_file(tmp, self.journal_path)
+        self.tail.start(header.encode("utf-8"), self.tail.seq)
+
+def read_entry(line):
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+# Name keys of the recipes a journal entry changes
+def touched_names(entry):
+    names = set()
+    if "name" in entry:
+        names.add(name_key(entry["name"]))
+    if "recipe" in entry:
+        names.add(name_key(entry["recipe"]["name"]))
+    return names
+
+# =====================================================
+# Journal Tail
+# -----------------------------------------------------
+# Follows recipes.json.journal like `tail -f`: read()
+# returns the complete lines added since the last call
+# (a line still being written is left for next time),
+# or [] straight away if the file has not changed.
+#
+# After a compaction the journal starts over with a new
+# first line. The tail then finishes the old generation
+# from .journal.old and carries on in the new one, which
+# must start at the seq it got to. If not (it missed a
+# whole generation) read() returns None and the caller
+# has to reload from recipes.json.
+# =====================================================
+class JournalTail:
+    def __init__(self, path):
+        self.path = path
+        self.header = None  # first line of the generation being read
+        self.base = None    # the recipes.json stamp in it
+        self.pos = 0        # bytes of it read so far
+        self.seq = 0        # seq of the last line read
+        self.stat = None    # file size / mtime at the last read
+
+    def start(self, header, seq):
+        self.header, self.pos, self.seq = header, len(header), seq
+        self.base = (read_entry(header) or {}).get("base")
+        self.stat = None
+
+    def copy(self):
+        other = JournalTail(self.path)
+        other.header, other.base, other.pos, other.seq, other.stat = self.header, self.base, self.pos, self.seq, self.stat
+        return other
+
+    def read(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        stat = (st.st_size, st.st_mtime_ns, st.st_ino)
+        if stat == self.stat:
+            return []
+
+        entries = []
+        with open(self.path, "rb") as f:
+            first = f.readline()
+            if not first.endswith(b"\n"):
+                return []   # just being created
+            if first != self.header:
+                if self.header is not None:
+                    entries = self.read_old()
+                header = read_entry(first)
+                if header is None or header.get("seq", 0) != self.seq:
+                    return None
+                self.start(first, self.seq)
+            entries += self.read_lines(f)
+        self.stat = stat
+        return entries
+
+    # The rest of the generation we were reading, if it is still there
+    def read_old(self):
+        try:
+            with open(self.path + ".old", "rb") as f:
+                if f.readline() != self.header:
+                    return []
+                return self.read_lines(f)
+        except FileNotFoundError:
+            return []
+
+    def read_lines(self, f):
+        f.seek(self.pos)
+        entries = []
+        for line in f:
+            entry = read_entry(line)
+            if entry is None:
+                break   # not completely written yet, or torn by a crash
+            # journals written before seq existed just count up
+            self.seq = entry.setdefault("seq", self.seq + 1)
+            self.pos += len(line)
+            entries.append(entry)
+        return entries
+
+# =====================================================
+# Apply one journal entry to a repository
+# -----------------------------------------------------
+# Idempotent, so an entry applied twice does no harm.
+# =====================================================
+def apply_change(repo, entry):
+    op = entry.get("op")
+
+    if op == "delete":
+        rid = repo.find(entry["name"])
+        if rid is not None:
+            repo.delete(rid)
+        return
+
+    recipe = entry["recipe"]
+    rid = repo.find(entry.get("name", recipe["name"]))
+    if rid is None:
+        rid = repo.find(recipe["name"])
+    other = repo.find(recipe["name"])
+    if other is not None and other != rid:
+        repo.delete(other)
+
+    if rid is None:
+        repo.add(recipe)
+    else:
+        repo.update(rid, recipe)
+
+# =====================================================
+# Write a JSON list through a temp file + rename
+# -----------------------------------------------------
+# One item per line: json.dumps without indent runs in
+# C, indent=2 falls back to the pure Python encoder and
+# was most of the time of a big compaction.
+# =====================================================
+def write_json_atomic(path, items):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("[\n" + ",\n".join(json.dumps(item, ensure_ascii=False) for item in items) + "\n]\n")
+        f.flush()
+        os.fsync(f.fileno())
+    replace_file(tmp, path)
+
+# os.replace, retried for a moment: on Windows it fails
+# while another window has the target open for a read
+REPLACE_TRIES = 20
+
+def replace_file(src, dst):
+    for attempt in range(REPLACE_TRIES):
+        try:
+            return os.replace(src, dst)
+        except PermissionError:
+            if attempt == REPLACE_TRIES - 1:
+                raise
+            time.sleep(0.05)
+
+# =====================================================
+# Background Writer
+# -----------------------------------------------------
+# Saves run on a worker thread so the Tk mainloop never
+# waits for the disk. Changes that arrive within DELAY
+# seconds of each other are written as one batch (but a
+# batch is never held back longer than MAX_DELAY).
+#
+# Tk is not thread safe, so the worker only puts results
+# on a queue; the Tk side picks them up with after() and
+# calls on_saved(count) / on_error(exception) /
+# on_conflict([dropped entries]) there.
+# A failed batch is kept and retried with the next one.
+# =====================================================
+DELAY = 0.3
+MAX_DELAY = 2.0
+POLL_MS = 100
+_STOP = object()
+
+class BackgroundWriter:
+    def __init__(self, storage, widget, on_saved=None, on_error=None, on_conflict=None):
+        self.storage = storage
+        self.widget = widget
+        self.callbacks = {"saved": on_saved, "error": on_error, "conflict": on_conflict}
+        self.changes = queue.Queue()
+        self.results = queue.Queue()
+        self.failed = []
+        self.thread = threading.Thread(target=self.run, name="recipe-writer", daemon=True)
+        self.thread.start()
+        self.poll_id = widget.after(POLL_MS, self.poll)
+
+    # several changes submitted together are always saved in the same write
+    def submit(self, *changes):
+        self.changes.put(list(changes))
+
+    # ================== Worker Thread ====================
+    def run(self):
+        self.storage.ready.wait()
+        running = True
+        while running:
+            changes = self.changes.get()
+            if changes is _STOP:
+                running = False
+                batch = []
+            else:
+                batch, running = self.collect(changes)
+
+            batch = self.failed + batch
+            if not batch:
+                continue
+            try:
+                rejected = self.storage.append(*batch)
+                self.failed = []
+                self.results.put(("saved", len(batch) - len(rejected)))
+                if rejected:
+                    self.results.put(("conflict", rejected))
+            except Exception as e:
+                self.failed = batch
+                self.results.put(("error", e))
+
+    def collect(self, first):
+        batch = list(first)
+        deadline = time.monotonic() + MAX_DELAY
+        while True:
+            wait = min(DELAY, deadline - time.monotonic())
+            if wait <= 0:
+                return batch, True
+            try:
+                changes = self.changes.get(timeout=wait)
+            except queue.Empty:
+                return batch, True
+            if changes is _STOP:
+                return batch, False
+            batch.extend(changes)
+
+    # ================== Tk Side ====================
+    def poll(self):
+        self.report()
+        self.poll_id = self.widget.after(POLL_MS, self.poll)
+
+    def report(self):
+        while True:
+            try:
+                kind, value = self.results.get_nowait()
+            except queue.Empty:
+                return
+            callback = self.callbacks[kind]
+            if callback:
+                callback(value)
+
+    # Flush everything still queued, stop the worker and fold the journal
+    # into recipes.json (called on exit)
+    def close(self, timeout=10):
+        if self.poll_id is not None:
+            self.widget.after_cancel(self.poll_id)
+            self.poll_id = None
+        self.changes.put(_STOP)
+        # nothing can be queued before the recipes finished loading
+        self.thread.join(timeout if self.storage.ready.is_set() else 0)
+        if self.failed and not self.thread.is_alive():
+            # last chance for a batch that failed earlier
+            try:
+                self.storage.append(*self.failed)
+                self.failed = []
+            except Exception as e:
+                self.results.put(("error", e))
+        if not self.failed and not self.thread.is_alive():
+            self.storage.close()
+        self.report()
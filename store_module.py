@@ -0,0 +1,332 @@
+import json, os
+from repository_module import Observable, RecipeRepository, SubstituteRepository
+from storage_module import RecipeStorage, BackgroundWriter, apply_change, touched_names
+from model_module import as_dict
+from loader_module import BackgroundLoader
+
+RECIPE_FILE = "recipes.json"
+SUB_FILE = "substitutes.json"
+NUTRIENT_CSV = "nutrients.csv"
+NUTRIENT_DB = "nutrients.db"
+SYNC_MS = 1000
+
+# =====================================================
+# Data Store
+# -----------------------------------------------------
+# The one place the app's data lives. main.App creates
+# it once and hands it to every page, so each JSON file
+# is parsed exactly once and all pages see the same
+# recipes.
+#
+# Pages change recipes through add_recipe / update_recipe
+# / delete_recipe, which update the repository (its
+# subscribers hear about the change right away) and
+# queue the save on the background writer.
+#
+# subscribe("recipes" | "substitutes", callback) gives
+# callback(event, item_id, item) for every change.
+#
+# Nothing is read in __init__: each file is loaded the
+# first time its repository is used, so the window can
+# show up before any JSON is parsed. The index modules
+# (search, graph, nutrition, nutrient table) are imported
+# the same way, by the property that builds them.
+#
+# Once start_writer() has given the store a Tk widget,
+# recipes are streamed in on a worker thread instead:
+# the repository starts empty and fills up batch by
+# batch (normal "add" events). subscribe("load", cb)
+# gets cb("progress", None, fraction) while loading and
+# cb("done", None, error) at the end (error is None if
+# all went well). Don't change recipes while loading.
+#
+# Other windows on the same recipes.json: every SYNC_MS
+# sync() reads the journal lines they wrote and applies
+# them to the repository, so pages hear about them as
+# normal events. Each save carries the journal seq this
+# window had seen (see RecipeStorage.append); a change
+# that lost to another window's is already in this
+# window's repository, so its recipes are read back
+# from the files (roll_back) before the on_conflict
+# callback is told.
+# =====================================================
+class DataStore:
+    def __init__(self, recipe_file=RECIPE_FILE, sub_file=SUB_FILE, nutrient_csv=NUTRIENT_CSV, nutrient_db=NUTRIENT_DB):
+        self.recipe_file = recipe_file
+        self.sub_file = sub_file
+        self.nutrient_csv = nutrient_csv
+        self.nutrient_db = nutrient_db
+        self.storage = RecipeStorage(recipe_file)
+        self.writer = None
+        self.widget = None
+        self.sub_error = None
+        self._recipes = None
+        self._substitutes = None
+        self._substitute_index = None
+        self._substitution_graph = None
+        self._nutrition_index = None
+        self._recipe_index = None
+        self._nutrients = None
+        self.building_nutrients = False
+        self.nutrient_error = None
+        self.tail = None        # journal position this window's recipes reflect
+        self.sync_job = None
+        self.on_conflict = None
+
+        self.load_events = Observable()
+        self.loading = False
+        self.load_progress = 0.0
+        self.load_error = None
+
+    @property
+    def recipes(self):
+        if self._recipes is None:
+            # a fresh snapshot opens in milliseconds, no need for a worker thread
+            if self.widget is not None and not self.storage.open_snapshot():
+                self.load_recipes_in_background()
+            else:
+                try:
+                    self._recipes = self.storage.load()
+                    self.tail = self.storage.loaded_tail
+                except (OSError, ValueError) as e:
+                    self.load_error = e
+                    self._recipes = RecipeRepository()
+        return self._recipes
+
+    # Recipes sorted by calories, kept current from recipe events (see nutrition_module)
+    @property
+    def nutrition_index(self):
+        if self._nutrition_index is None:
+            from nutrition_module import NutritionIndex
+            self._nutrition_index = NutritionIndex(self.recipes)
+        return self._nutrition_index
+
+    # Word / prefix search over recipe and ingredient names (see search_module)
+    @property
+    def recipe_index(self):
+        if self._recipe_index is None:
+            from search_module import RecipeSearchIndex
+            self._recipe_index = RecipeSearchIndex(self.recipes)
+        return self._recipe_index
+
+    # Nutrient table for automatic calories (see nutrient_module). None if there
+    # is none, or while nutrients.db is rebuilt from a newer nutrients.csv on a
+    # worker thread.
+    @property
+    def nutrients(self):
+        if self._nutrients is None and not self.building_nutrients:
+            from nutrient_module import NutrientDB, needs_build, build, build_in_steps
+            # a CSV that failed to build once is not tried again, an older db is used
+            if self.nutrient_error is None and needs_build(self.nutrient_csv, self.nutrient_db):
+                if self.widget is not None:
+                    self.building_nutrients = True
+                    BackgroundLoader(self.widget, build_in_steps(self.nutrient_csv, self.nutrient_db),
+                                     lambda *message: None, self.on_nutrients_built)
+                    return None
+                try:
+                    build(self.nutrient_csv, self.nutrient_db)
+                except (OSError, ValueError) as e:
+                    self.nutrient_error = e
+            if os.path.exists(self.nutrient_db):
+                self._nutrients = NutrientDB(self.nutrient_db)
+        return self._nutrients
+
+    def on_nutrients_built(self, error):
+        self.building_nutrients = False
+        self.nutrient_error = error
+
+    # ================== Background Loading ====================
+    def load_recipes_in_background(self):
+        if self._recipes is None:
+            self._recipes = RecipeRepository()
+        self.loading = True
+        BackgroundLoader(self.widget, self.storage.load_in_chunks(), self.on_load_message, self.on_load_done)
+
+    def on_load_message(self, kind, data, progress):
+        if kind == "recipes":
+            for recipe in data:
+                self._recipes.put(recipe)
+        else:
+            for entry in data:
+                apply_change(self._recipes, entry)
+        self.load_progress = progress
+        self.load_events.notify("progress", None, progress)
+
+    def on_load_done(self, error):
+        if error is None:
+            self.tail = self.storage.loaded_tail
+        self.loading = False
+        self.load_progress = 1.0
+        self.load_error = error
+        self.load_events.notify("done", None, error)
+
+    # After a failed load (Retry on the Recipes page): empty the repository,
+    # so pages drop what was read, and stream recipes.json in again
+    def retry_load(self):
+        if self.loading or self.load_error is None:
+            return
+        for rid in list(self._recipes.ids()):
+            self._recipes.delete(rid)
+        self.load_error = None
+        self.load_progress = 0.0
+        self.load_recipes_in_background()
+
+    @property
+    def substitutes(self):
+        if self._substitutes is None:
+            self._substitutes = SubstituteRepository(self.load_substitutes())
+        return self._substitutes
+
+    # Typeahead index over substitute keys and substitute names
+    # (what a name replaces is looked up in substitution_graph)
+    @property
+    def substitute_index(self):
+        if self._substitute_index is None:
+            from search_module import SearchIndex
+            self._substitute_index = SearchIndex()
+            for key in self.substitutes.names():
+                self.index_substitute("add", None, self.substitutes.get(key))
+            self.substitutes.subscribe(self.index_substitute)
+        return self._substitute_index
+
+    # Multi-hop "what can replace X" / "what can X replace" (see graph_module)
+    @property
+    def substitution_graph(self):
+        if self._substitution_graph is None:
+            from graph_module import SubstitutionGraph
+            self._substitution_graph = SubstitutionGraph(self.substitutes, self.sub_file)
+        return self._substitution_graph
+
+    def index_substitute(self, event, _, entry):
+        self._substitute_index.add(entry["name"])
+        for sub in entry["subs"]:
+            self._substitute_index.add(sub)
+
+    def load_substitutes(self):
+        if not os.path.exists(self.sub_file):
+            self.sub_error = f"JSON file '{self.sub_file}' not found."
+            return {}
+        try:
+            with open(self.sub_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            self.sub_error = "Failed to read JSON file."
+            return {}
+
+    def subscribe(self, topic, callback):
+        if topic == "load":
+            return self.load_events.subscribe(callback)
+        repo = self.recipes if topic == "recipes" else self.substitutes
+        repo.subscribe(callback)
+
+    # ================== Saving ====================
+    # widget is any Tk widget, the writer reports back through its after()
+    # and other windows' changes are picked up with it too
+    def start_writer(self, widget, on_error=None, on_conflict=None):
+        self.widget = widget
+        self.on_conflict = on_conflict
+        self.writer = BackgroundWriter(self.storage, widget, on_error=on_error, on_conflict=self.on_save_conflict)
+        self.sync_job = widget.after(SYNC_MS, self.sync)
+
+    def save(self, *changes):
+        if self.tail is not None:
+            changes = [dict(change, base=self.tail.seq) for change in changes]
+        if self.writer is None:
+            rejected = self.storage.append(*changes)
+            if rejected:
+                self.on_save_conflict(rejected)
+        else:
+            self.writer.submit(*changes)
+
+    def on_save_conflict(self, changes):
+        self.roll_back(changes)
+        if self.on_conflict:
+            self.on_conflict(changes)
+
+    # Puts the recipes the rejected changes touched back the way the
+    # files have them (the other window's version)
+    def roll_back(self, changes):
+        try:
+            saved = RecipeStorage(self.recipe_file).read()
+        except (OSError, ValueError):
+            return self.resync()
+        current = self._recipes
+        for key in set().union(*map(touched_names, changes)):
+            recipe, rid = saved.get_by_name(key), current.find(key)
+            if recipe is None:
+                if rid is not None:
+                    current.delete(rid)
+            elif rid is None:
+                current.add(recipe)
+            elif as_dict(current.get(rid)) != as_dict(recipe):
+                current.update(rid, recipe)
+
+    def close(self):
+        if self.sync_job is not None:
+            self.widget.after_cancel(self.sync_job)
+            self.sync_job = None
+        if self.writer is not None:
+            self.writer.close()
+        else:
+            self.storage.close()
+
+    # ================== Other Windows ====================
+    def sync(self):
+        self.sync_job = self.widget.after(SYNC_MS, self.sync)
+        self.catch_up()
+
+    # Applies the journal lines other windows wrote since the last call
+    def catch_up(self):
+        if self.tail is None or self.loading:
+            return
+        try:
+            entries = self.tail.read()
+        except OSError:
+            return      # try again next time
+        if entries is None:
+            return self.resync()
+        for entry in entries:
+            if entry.get("by") != self.storage.instance:
+                apply_change(self._recipes, entry)
+
+    # This window missed lines that were already folded into recipes.json:
+    # read the files again and apply only the differences
+    def resync(self):
+        fresh = RecipeStorage(self.recipe_file)
+        try:
+            repo = fresh.load()
+        except (OSError, ValueError):
+            return
+        current = self._recipes
+        for rid in current.ids():
+            if repo.find(current.get(rid)["name"]) is None:
+                current.delete(rid)
+        for recipe in repo:
+            rid = current.find(recipe["name"])
+            if rid is None:
+                current.add(recipe)
+            elif as_dict(current.get(rid)) != as_dict(recipe):
+                current.update(rid, recipe)
+        self.tail = fresh.loaded_tail
+
+    # ================== Recipe Changes ====================
+    def add_recipe(self, recipe):
+        rid = self.recipes.add(recipe)
+        self.save({"op": "add", "recipe": recipe})
+        return rid
+
+    # Many recipes at once (bulk import), saved in one journal write
+    def add_recipes(self, recipes):
+        rids = [self.recipes.add(recipe) for recipe in recipes]
+        self.save(*[{"op": "add", "recipe": recipe} for recipe in recipes])
+        return rids
+
+    def update_recipe(self, rid, recipe):
+        old = self.recipes.update(rid, recipe)
+        self.save({"op": "update", "name": old["name"], "recipe": recipe})
+        return old
+
+    def delete_recipe(self, rid):
+        recipe = self.recipes.delete(rid)
+        self.save({"op": "delete", "name": recipe["name"]})
+        return recipe
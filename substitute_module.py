@@ -1,13 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json, os
+from core_module import lookup_substitutes
 
 # Unified colors
 BG_LIGHT = "#F7F9FC"
 PRIMARY = "#6F82EF"
 
-SUB_FILE = "substitutes.json"
-
 # ==================== Unified Button Style ======================
 def modern_button(parent, text, command, width=16):
     btn = tk.Button(parent, text=text, command=command, width=width,bg=PRIMARY, fg="white",activebackground="#5B6EDC", activeforeground="white",relief="flat", font=("Segoe UI", 11, "bold"),cursor="hand2")
@@ -17,12 +15,15 @@ def modern_button(parent, text, command, width=16):
 
 # ==================== Substitute Page ===========================
 class SubstitutePage(tk.Frame):
-    def __init__(self, parent):
+    def __init__(self, parent, store):
         super().__init__(parent, bg=BG_LIGHT)
 
-        # Load JSON
-        self.subs = self.load_json()
-        self.categories = self.build_categories()
+        # Loaded once by the shared store (see store_module)
+        self.subs = store.substitutes
+        self.search_index = store.substitute_index
+        self.graph = store.substitution_graph
+        if store.sub_error:
+            messagebox.showerror("Error", store.sub_error)
 
         # ======================== TITLE ============================
         tk.Label(self, text="Ingredient Substitutes",font=("Segoe UI", 22, "bold"),bg=BG_LIGHT, fg=PRIMARY).pack(pady=15)
@@ -34,7 +35,7 @@ class SubstitutePage(tk.Frame):
         # ======================== CATEGORY =========================
         tk.Label(main, text="Select Category:",font=("Segoe UI", 13, "bold"),bg=BG_LIGHT, fg="#2C3E50").grid(row=0, column=0, pady=10, sticky="w")
 
-        self.category_cb = ttk.Combobox(main, state="readonly", width=28,values=list(self.categories.keys()))
+        self.category_cb = ttk.Combobox(main, state="readonly", width=28,values=list(self.subs.categories().keys()))
         self.category_cb.grid(row=0, column=1, padx=10)
         self.category_cb.bind("<<ComboboxSelected>>", self.update_ingredients)
 
@@ -49,6 +50,18 @@ class SubstitutePage(tk.Frame):
         # ======================== SEARCH BUTTON =====================
         modern_button(main, "Searching", self.find_substitute, 18).grid(row=3, column=1, pady=18, padx=24, sticky="w")
 
+        # ======================== QUICK SEARCH ======================
+        tk.Label(main, text="Or type to search:",font=("Segoe UI", 13, "bold"),bg=BG_LIGHT, fg="#2C3E50").grid(row=0, column=2, padx=(30, 0), sticky="w")
+
+        self.search_entry = ttk.Entry(main, width=26, font=("Segoe UI", 11))
+        self.search_entry.grid(row=1, column=2, padx=(30, 0), sticky="w")
+        self.search_entry.bind("<KeyRelease>", self.update_suggestions)
+        self.search_entry.bind("<Return>", self.pick_first_suggestion)
+
+        self.suggest_list = tk.Listbox(main, width=28, height=4, font=("Segoe UI", 11), exportselection=False)
+        self.suggest_list.grid(row=2, column=2, rowspan=2, padx=(30, 0), sticky="nw")
+        self.suggest_list.bind("<<ListboxSelect>>", self.pick_suggestion)
+
         # ======================== RESULT LABEL ======================
         tk.Label(self, text="Replacement Suggestion:",font=("Segoe UI", 14, "bold"),bg=BG_LIGHT, fg="#2C3E50").pack(anchor="w", padx=40, pady=(15, 5))
 
@@ -57,35 +70,10 @@ class SubstitutePage(tk.Frame):
         self.result_box.pack(padx=40, pady=5)
         self.result_box.config(state="disabled")
 
-    # ================== Load JSON ====================
-    def load_json(self):
-        if os.path.exists(SUB_FILE):
-            try:
-                with open(SUB_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except:
-                messagebox.showerror("Error", "Failed to read JSON file.")
-                return {}
-        else:
-            messagebox.showerror("Error", f"JSON file '{SUB_FILE}' not found.")
-            return {}
-
-    # ================== Build Category List ====================
-    def build_categories(self):
-        categories = {}
-
-        for ing, data in self.subs.items():
-            cat = data.get("category", "Others")
-            if cat not in categories:
-                categories[cat] = []
-            categories[cat].append(ing)
-
-        return categories
-
     # ================== Update Ingredient After Category Change ====================
     def update_ingredients(self, event):
         cat = self.category_cb.get()
-        ingredients = self.categories.get(cat, [])
+        ingredients = self.subs.ingredients_in(cat)
         self.ing_cb["values"] = ingredients
         self.ing_cb.set("")
 
@@ -97,16 +85,52 @@ class SubstitutePage(tk.Frame):
             messagebox.showwarning("Warning", "Please select an ingredient.")
             return
 
-        if ing not in self.subs:
+        self.show_substitutes(ing)
+
+    def show_substitutes(self, ing):
+        found = lookup_substitutes(self.subs, self.graph, ing)
+        if found is None:
             self.display_result(f"No substitute found for '{ing}'.")
             return
 
-        text = f"Ingredient: {ing}\n\nSubstitutes:\n"
-        for s in self.subs[ing]["subs"]:
-            text += f"- {s}\n"
+        text = f"Ingredient: {ing}\n"
+        if found["direct"]:
+            text += "\nSubstitutes:\n"
+            for s in found["direct"]:
+                text += f"- {s}\n"
+
+        # substitutes of substitutes, closest first
+        if found["further"]:
+            text += "\nMore options (via another substitute):\n"
+            for name, hops, via in found["further"]:
+                text += f"- {name}  ({hops} steps, via {via})\n"
+
+        if found["replaces"]:
+            text += "\nCan be used instead of:\n"
+            for name, hops, via in found["replaces"]:
+                text += f"- {name}\n" if hops == 1 else f"- {name}  ({hops} steps, via {via})\n"
 
         self.display_result(text)
 
+    # ================== Quick Search (typeahead) ====================
+    def update_suggestions(self, event=None):
+        if event is not None and event.keysym == "Return":
+            return
+        self.suggest_list.delete(0, "end")
+        for term in self.search_index.search(self.search_entry.get(), limit=10):
+            self.suggest_list.insert("end", term)
+
+    def pick_suggestion(self, event=None):
+        sel = self.suggest_list.curselection()
+        if sel:
+            self.show_substitutes(self.suggest_list.get(sel[0]).strip().lower())
+
+    def pick_first_suggestion(self, event=None):
+        if self.suggest_list.size():
+            self.suggest_list.selection_clear(0, "end")
+            self.suggest_list.selection_set(0)
+            self.pick_suggestion()
+
     # ================== Display ====================
     def display_result(self, text):
         self.result_box.config(state="normal")
@@ -0,0 +1,16 @@
+import json, os, sys
+
+# the modules live next to main.py, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+def make_recipe(name, kcal=100, ingredients=("egg",)):
+    ings = [{"name": ing, "qty": 1.0, "unit": "pcs", "kcal": kcal / len(ingredients)} for ing in ingredients]
+    return {"name": name, "ingredients": ings, "total_cal": kcal}
+
+@pytest.fixture
+def recipe_file(tmp_path):
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps([make_recipe("Monday"), make_recipe("Tuesday", 200)]), encoding="utf-8")
+    return str(path)
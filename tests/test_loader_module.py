@@ -0,0 +1,39 @@
+import json
+import pytest
+from loader_module import JsonArrayReader
+
+def read_all(path, chunk_chars):
+    with open(path, "r", encoding="utf-8") as f:
+        reader = JsonArrayReader(f, chunk_chars)
+        items = list(reader)
+    return items, reader.progress
+
+def test_items_come_out_as_json_load_reads_them(tmp_path):
+    items = [{"name": f"R{i}", "note": "ä, ] } \" [" * (i % 4), "n": [i, i / 3]} for i in range(200)]
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps(items, ensure_ascii=False, indent=1), encoding="utf-8")
+    for chunk_chars in (1, 7, 64, 1 << 20):
+        assert read_all(path, chunk_chars) == (items, 1.0)
+
+@pytest.mark.parametrize("text", ['{"a": 1}', '[{"a": 1}, {"b": ', '[{"a": 1} {"b": 2}'])
+def test_bad_files_raise(tmp_path, text):
+    path = tmp_path / "recipes.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError):
+        read_all(path, 4)
+
+def test_empty_array(tmp_path):
+    path = tmp_path / "recipes.json"
+    path.write_text(" [ ] ", encoding="utf-8")
+    assert read_all(path, 2) == ([], 1.0)
+
+def test_a_malformed_item_fails_fast(tmp_path):
+    path = tmp_path / "recipes.json"
+    path.write_text('[{"name": "ok"}, {"name": "broken" "x"' + ', {"name": "filler"}' * 20000 + "]", encoding="utf-8")
+    with open(path, "r", encoding="utf-8") as f:
+        reader = JsonArrayReader(f, chunk_chars=64, max_item_chars=1000)
+        items = iter(reader)
+        assert next(items) == {"name": "ok"}
+        with pytest.raises(ValueError, match="character 17"):
+            next(items)
+        assert reader.read_chars < 2000
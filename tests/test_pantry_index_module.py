@@ -0,0 +1,20 @@
+from conftest import make_recipe
+from pantry_index_module import PantryIndex
+from repository_module import RecipeRepository
+
+def test_cook_from_the_pantry():
+    repo = RecipeRepository([make_recipe("Fried Rice", ingredients=("rice", "egg")),
+                             make_recipe("Omelette", ingredients=("egg", "milk", "salt")),
+                             make_recipe("Toast", ingredients=("bread",))])
+    index = PantryIndex(repo)
+
+    def names(results):
+        return [(missing, repo.get(rid)["name"], absent) for missing, rid, absent, _ in results]
+
+    assert names(index.query(["Egg", "rice"])) == [(0, "Fried Rice", [])]
+    assert names(index.query(["egg", "milk"], 1)) == [(1, "Fried Rice", ["rice"]), (1, "Omelette", ["salt"]),
+                                                      (1, "Toast", ["bread"])]
+
+    repo.add(make_recipe("Boiled Egg"))
+    repo.delete(repo.find("Fried Rice"))
+    assert names(index.query(["egg"])) == [(0, "Boiled Egg", [])]
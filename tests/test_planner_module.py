@@ -0,0 +1,45 @@
+import random
+from itertools import combinations
+from nutrition_module import NutritionIndex
+from planner_module import MealPlanner
+from repository_module import RecipeRepository
+
+def catalog(seed, count=24):
+    rng = random.Random(seed)
+    foods = [f"food{i}" for i in range(15)]
+    return RecipeRepository([{"name": f"R{i}", "total_cal": rng.randrange(200, 1000, 10),
+                              "ingredients": [{"name": f, "qty": 1, "unit": "g", "kcal": 0} for f in rng.sample(foods, rng.randint(1, 5))]}
+                             for i in range(count)])
+
+def ingredient_count(repo, rids):
+    return len({ing["name"] for rid in rids for ing in repo.get(rid)["ingredients"]})
+
+def test_plans_match_a_brute_force_search():
+    for seed in range(5):
+        repo = catalog(seed)
+        planner = MealPlanner(repo, NutritionIndex(repo))
+        for n, lo, hi in ((2, 900, 1100), (3, 1800, 2200), (3, 100, 300)):
+            plans, timed_out = planner.plan(n, lo, hi, budget_ms=5000)
+            assert not timed_out
+
+            feasible = [c for c in combinations(repo.ids(), n)
+                        if lo <= sum(repo.get(rid)["total_cal"] for rid in c) <= hi]
+            if not feasible:
+                assert plans == []
+                continue
+            assert plans[0]["ingredients"] == min(ingredient_count(repo, c) for c in feasible)
+            for plan in plans:
+                assert len(set(plan["recipes"])) == n
+                assert lo <= plan["total_cal"] <= hi
+                assert plan["total_cal"] == sum(repo.get(rid)["total_cal"] for rid in plan["recipes"])
+                assert plan["ingredients"] == ingredient_count(repo, plan["recipes"])
+            assert [p["ingredients"] for p in plans] == sorted(p["ingredients"] for p in plans)
+
+def test_planner_follows_recipe_changes():
+    repo = catalog(1, 6)
+    planner = MealPlanner(repo, NutritionIndex(repo))
+    rid = repo.add({"name": "Big", "total_cal": 5000, "ingredients": [{"name": "x", "qty": 1, "unit": "g", "kcal": 0}]})
+    plans, _ = planner.plan(1, 4900, 5100)
+    assert [p["recipes"] for p in plans] == [[rid]]
+    repo.delete(rid)
+    assert planner.plan(1, 4900, 5100)[0] == []
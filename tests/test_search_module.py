@@ -0,0 +1,31 @@
+from conftest import make_recipe
+from repository_module import RecipeRepository
+from search_module import RecipeSearchIndex, SearchIndex
+
+def test_prefix_and_fuzzy_search():
+    index = SearchIndex()
+    for term in ("Almond Milk", "soy milk", "oat milk", "butter", "buttermilk", "soy milk"):
+        index.add(term)
+    assert len(index) == 5
+    assert sorted(index.search("mil")) == ["Almond Milk", "oat milk", "soy milk"]
+    assert index.search("butter")[:2] == ["butter", "buttermilk"]
+    assert index.search("buter")[0] == "butter"         # typo
+    assert index.search("") == []
+
+def test_recipe_search_follows_the_repository():
+    repo = RecipeRepository([make_recipe("Fried Rice", ingredients=("rice", "egg")),
+                             make_recipe("Chicken Rice", ingredients=("chicken", "rice")),
+                             make_recipe("Omelette", ingredients=("egg", "milk"))])
+    index = RecipeSearchIndex(repo)
+
+    def names(query):
+        return sorted(repo.get(rid)["name"] for rid in index.search(query))
+
+    assert names("chi ric") == ["Chicken Rice"]
+    assert names("egg") == ["Fried Rice", "Omelette"]
+    assert index.search("  ") is None
+
+    repo.update(repo.find("Omelette"), make_recipe("Pancake", ingredients=("flour", "milk")))
+    repo.delete(repo.find("Fried Rice"))
+    assert names("egg") == []
+    assert names("pan mil") == ["Pancake"]
@@ -0,0 +1,53 @@
+import os
+from conftest import make_recipe
+from model_module import as_dict
+from repository_module import RecipeRepository
+from snapshot_module import SnapshotRepository, open_snapshot, write_snapshot
+from storage_module import RecipeStorage
+
+def dicts(repo):
+    return sorted((as_dict(recipe) for recipe in repo), key=lambda r: r["name"])
+
+def test_round_trip(tmp_path):
+    repo = RecipeRepository([make_recipe("Monday"), make_recipe("Tuesday", 250, ("rice", "egg")),
+                             make_recipe("Café au lait", 12.5, ("milk",))])
+    # a recipe the compact record cannot hold is kept as raw JSON
+    repo.add({"name": "Odd", "ingredients": [{"name": "salt", "qty": "a pinch", "unit": "", "kcal": 0}], "total_cal": 0})
+    path = str(tmp_path / "recipes.json.snap")
+    write_snapshot(path, list(repo), [123, 456])
+
+    snapshot = open_snapshot(path, [123, 456])
+    assert snapshot is not None and len(snapshot) == 4
+    assert dicts(SnapshotRepository(snapshot)) == dicts(repo)
+    assert SnapshotRepository(snapshot).get_by_name("café AU LAIT")["total_cal"] == 12.5
+    assert [f for f in os.listdir(tmp_path) if f.endswith(".tmp")] == []
+
+def test_stale_snapshot_is_not_used(tmp_path):
+    path = str(tmp_path / "recipes.json.snap")
+    write_snapshot(path, [make_recipe("Monday")], [1, 2])
+    assert open_snapshot(path, [1, 3]) is None
+    assert open_snapshot(path, None) is None
+    assert open_snapshot(str(tmp_path / "missing.snap"), [1, 2]) is None
+
+def test_changes_on_top_of_a_snapshot(recipe_file):
+    RecipeStorage(recipe_file).load(background_snapshot=False)
+    storage = RecipeStorage(recipe_file)
+    assert storage.open_snapshot()
+    repo = SnapshotRepository(storage.snapshot)
+
+    repo.update(repo.find("Monday"), make_recipe("Mon", 1))
+    repo.delete(repo.find("Tuesday"))
+    repo.add(make_recipe("Wednesday"))
+    assert sorted(r["name"] for r in repo) == ["Mon", "Wednesday"]
+    assert repo.find("monday") is None and repo.find("tuesday") is None
+    # the copy the storage keeps is independent
+    copy = repo.copy()
+    copy.delete(copy.find("Mon"))
+    assert repo.find("Mon") is not None
+
+def test_storage_opens_the_snapshot_it_wrote(recipe_file):
+    first = RecipeStorage(recipe_file)
+    loaded = first.load(background_snapshot=False)
+    second = RecipeStorage(recipe_file)
+    assert dicts(second.load()) == dicts(loaded)
+    assert isinstance(second.repo, SnapshotRepository)
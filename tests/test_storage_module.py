@@ -0,0 +1,120 @@
+import json, os
+from conftest import make_recipe
+from storage_module import RecipeStorage
+
+def names(repo):
+    return sorted(recipe["name"] for recipe in repo)
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return sorted(recipe["name"] for recipe in json.load(f))
+
+def test_close_folds_the_journal(recipe_file):
+    storage = RecipeStorage(recipe_file)
+    storage.load(background_snapshot=False)
+    storage.append({"op": "add", "recipe": make_recipe("Wednesday")})
+    assert read_json(recipe_file) == ["Monday", "Tuesday"]
+
+    storage.close()
+    assert read_json(recipe_file) == ["Monday", "Tuesday", "Wednesday"]
+    assert names(RecipeStorage(recipe_file).load()) == ["Monday", "Tuesday", "Wednesday"]
+
+def test_journal_of_a_replaced_file_is_set_aside(recipe_file):
+    storage = RecipeStorage(recipe_file)
+    storage.load()
+    storage.append({"op": "add", "recipe": make_recipe("Wednesday")})
+    journal = storage.journal_path
+    with open(journal, "rb") as f:
+        saved = f.read()
+
+    # restored from a backup: the journal was written on top of another file
+    with open(recipe_file, "w", encoding="utf-8") as f:
+        json.dump([make_recipe("Monday")], f)
+
+    other = RecipeStorage(recipe_file)
+    assert names(other.load()) == ["Monday"]
+    assert other.orphaned == journal + ".orphan"
+    assert not os.path.exists(journal)
+    with open(other.orphaned, "rb") as f:
+        assert f.read() == saved
+
+def test_close_waits_for_the_snapshot(recipe_file):
+    storage = RecipeStorage(recipe_file)
+    storage.load()
+    storage.close()
+    folder = os.path.dirname(recipe_file)
+    assert [f for f in os.listdir(folder) if f.endswith(".tmp")] == []
+    assert storage.open_snapshot()
+
+def test_journal_is_replayed_and_a_torn_line_dropped(recipe_file):
+    storage = RecipeStorage(recipe_file)
+    storage.load()
+    storage.append({"op": "add", "recipe": make_recipe("Wednesday")},
+                   {"op": "update", "name": "Monday", "recipe": make_recipe("Mon", 150)},
+                   {"op": "delete", "name": "Tuesday"})
+    storage.close()     # only joins the snapshot: nothing is folded yet below
+    with open(storage.journal_path, "ab") as f:
+        f.write(b'{"op": "add", "recipe": {"na')     # crash halfway through a line
+    size = os.path.getsize(storage.journal_path)
+
+    # a read-only load skips the torn line and leaves it there
+    assert names(RecipeStorage(recipe_file).read()) == ["Mon", "Wednesday"]
+    assert os.path.getsize(storage.journal_path) == size
+
+    # the app's load drops it, so the next append starts on a clean line
+    again = RecipeStorage(recipe_file)
+    assert names(again.load()) == ["Mon", "Wednesday"]
+    assert os.path.getsize(storage.journal_path) < size
+    again.append({"op": "add", "recipe": make_recipe("Thursday")})
+    assert names(RecipeStorage(recipe_file).read()) == ["Mon", "Thursday", "Wednesday"]
+
+def test_compaction_every_n_changes(recipe_file, monkeypatch):
+    monkeypatch.setattr("storage_module.COMPACT_EVERY", 3)
+    storage = RecipeStorage(recipe_file)
+    storage.load()
+    for day in ("Wednesday", "Thursday", "Friday"):
+        storage.append({"op": "add", "recipe": make_recipe(day)})
+
+    assert read_json(recipe_file) == ["Friday", "Monday", "Thursday", "Tuesday", "Wednesday"]
+    assert storage.pending == 0
+    with open(storage.journal_path, "rb") as f:
+        assert len(f.readlines()) == 1    # just the header of the new generation
+    assert os.path.exists(storage.old_journal_path)
+    assert names(RecipeStorage(recipe_file).load()) == read_json(recipe_file)
+
+def test_other_window_catches_up_across_a_compaction(recipe_file, monkeypatch):
+    monkeypatch.setattr("storage_module.COMPACT_EVERY", 2)
+    a, b = RecipeStorage(recipe_file), RecipeStorage(recipe_file)
+    a.load()
+    b.load()
+    a.append({"op": "add", "recipe": make_recipe("Wednesday")})
+    a.append({"op": "add", "recipe": make_recipe("Thursday")})    # folds the journal
+    a.append({"op": "add", "recipe": make_recipe("Friday")})
+
+    b.append({"op": "add", "recipe": make_recipe("Saturday")})
+    a.catch_up()
+    assert names(b.repo) == names(a.repo) == ["Friday", "Monday", "Saturday", "Thursday", "Tuesday", "Wednesday"]
+
+def test_change_to_a_recipe_another_window_changed_is_rejected(recipe_file):
+    a, b = RecipeStorage(recipe_file), RecipeStorage(recipe_file)
+    a.load()
+    b.load()
+    seen = b.tail.seq
+    a.append({"op": "update", "name": "Monday", "recipe": make_recipe("Monday", 999), "base": a.tail.seq})
+
+    mine = {"op": "update", "name": "Monday", "recipe": make_recipe("Monday", 1), "base": seen}
+    other = {"op": "update", "name": "Tuesday", "recipe": make_recipe("Tuesday", 1), "base": seen}
+    assert b.append(mine, other) == [mine]
+    saved = RecipeStorage(recipe_file).read()
+    assert saved.get_by_name("Monday")["total_cal"] == 999
+    assert saved.get_by_name("Tuesday")["total_cal"] == 1
+
+def test_read_changes_no_files(recipe_file):
+    storage = RecipeStorage(recipe_file)
+    storage.load(background_snapshot=False)
+    storage.append({"op": "add", "recipe": make_recipe("Wednesday")})
+    folder = os.path.dirname(recipe_file)
+    before = {name: os.stat(os.path.join(folder, name)).st_mtime_ns for name in os.listdir(folder)}
+
+    assert names(RecipeStorage(recipe_file).read()) == ["Monday", "Tuesday", "Wednesday"]
+    assert {name: os.stat(os.path.join(folder, name)).st_mtime_ns for name in os.listdir(folder)} == before
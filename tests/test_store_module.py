@@ -0,0 +1,38 @@
+from conftest import make_recipe
+from model_module import as_dict
+from storage_module import RecipeStorage
+from store_module import DataStore
+
+def open_store(recipe_file):
+    store = DataStore(recipe_file)
+    store.recipes
+    return store
+
+def names(repo):
+    return sorted(recipe["name"] for recipe in repo)
+
+def test_rejected_rename_is_rolled_back(recipe_file):
+    a, b = open_store(recipe_file), open_store(recipe_file)
+    conflicts = []
+    b.on_conflict = conflicts.append
+
+    a.update_recipe(a.recipes.find("Monday"), make_recipe("Monday", 999))
+    b.update_recipe(b.recipes.find("Monday"), make_recipe("Mon3"))
+    b.catch_up()
+
+    assert [c["recipe"]["name"] for c in conflicts[0]] == ["Mon3"]
+    assert names(b.recipes) == names(RecipeStorage(recipe_file).read()) == ["Monday", "Tuesday"]
+    assert b.recipes.get_by_name("Monday")["total_cal"] == 999
+
+    # editing it again is an update of the saved recipe, not a new one
+    b.update_recipe(b.recipes.find("Monday"), make_recipe("Monday", 500))
+    a.catch_up()
+    assert names(a.recipes) == ["Monday", "Tuesday"]
+    assert as_dict(a.recipes.get_by_name("Monday")) == as_dict(b.recipes.get_by_name("Monday"))
+
+def test_other_windows_changes_are_applied(recipe_file):
+    a, b = open_store(recipe_file), open_store(recipe_file)
+    a.add_recipe(make_recipe("Wednesday"))
+    a.delete_recipe(a.recipes.find("Tuesday"))
+    b.catch_up()
+    assert names(b.recipes) == ["Monday", "Wednesday"]
@@ -0,0 +1,414 @@
+import tkinter as tk
+from tkinter import ttk
+from bisect import bisect_left
+
+BG_LIGHT = "#F7F9FC"
+PRIMARY = "#6F82EF"
+
+# =====================================================
+# Virtual Scroll (shared by the virtual widgets below)
+# -----------------------------------------------------
+# Keeps track of which row is at the top and drives a
+# ttk.Scrollbar by hand. Subclasses say how many rows
+# there are (count) and draw the visible ones (render).
+# =====================================================
+class VirtualScroll(tk.Frame):
+    def __init__(self, parent, rows):
+        super().__init__(parent, bg=parent["bg"])
+        self.rows = rows
+        self.top = 0
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar_job = None
+
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self.scroll_by(-1 if e.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda e: self.scroll_by(-1))
+        widget.bind("<Button-5>", lambda e: self.scroll_by(1))
+
+    def max_top(self):
+        return max(0, self.count() - self.rows)
+
+    # many changes in one go (e.g. while loading) only move the scrollbar once
+    def update_scrollbar(self):
+        if self.scrollbar_job is None:
+            self.scrollbar_job = self.after_idle(self.set_scrollbar)
+
+    def set_scrollbar(self):
+        self.scrollbar_job = None
+        n = self.count()
+        if n <= self.rows:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / n, (self.top + self.rows) / n)
+
+    def scroll_to(self, top):
+        top = max(0, min(int(top), self.max_top()))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(value) * self.count())
+        elif action == "scroll":
+            step = self.rows if unit == "pages" else 1
+            self.scroll_by(int(value) * step)
+
+# =====================================================
+# Virtual List View
+# -----------------------------------------------------
+# A Listbox that only ever holds the rows on screen.
+# The full list is a sorted list of recipe ids (ids grow
+# in insertion order) and label(id) gives the row text.
+# Scrolling refills the few visible rows, and insert /
+# update / remove only touch the Listbox when the change
+# is on screen, so a change costs a handful of Tk calls
+# no matter how many recipes there are.
+#
+# The selection is kept as an id, not a row number, so
+# it stays on the same recipe when rows move around.
+#
+# set_ids(ids, ordered=True) shows a short ranked list
+# (e.g. the 20 lowest-calorie recipes) in the given order
+# instead.
+# =====================================================
+class VirtualListView(VirtualScroll):
+    def __init__(self, parent, label, height=7, **listbox_opts):
+        super().__init__(parent, height)
+        self.label = label
+        self.ids = []
+        self.ordered = False
+        self.selected = None
+
+        self.listbox = tk.Listbox(self, height=height, exportselection=False, activestyle="none", **listbox_opts)
+        self.listbox.pack(side="left", fill="x", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.bind_wheel(self.listbox)
+        self.listbox.bind("<Up>", lambda e: self.move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self.move_selection(1))
+
+    # ================== Model ====================
+    # ordered=True keeps ids in the given order (for short ranked lists such
+    # as a top-N); items are then looked up by scanning, and insert_id
+    # should not be used
+    def set_ids(self, ids, ordered=False):
+        self.ordered = ordered
+        self.ids = list(ids) if ordered else sorted(ids)
+        if self.selected is not None and not self.contains(self.selected):
+            self.selected = None
+        self.top = min(self.top, self.max_top())
+        self.render()
+
+    # index of item_id in ids, or None
+    def position(self, item_id):
+        if self.ordered:
+            return self.ids.index(item_id) if item_id in self.ids else None
+        pos = bisect_left(self.ids, item_id)
+        return pos if pos < len(self.ids) and self.ids[pos] == item_id else None
+
+    def contains(self, item_id):
+        return self.position(item_id) is not None
+
+    def insert_id(self, item_id):
+        pos = bisect_left(self.ids, item_id)
+        if pos < len(self.ids) and self.ids[pos] == item_id:
+            return self.update_id(item_id)
+        self.ids.insert(pos, item_id)
+        if pos < self.top + self.rows:
+            self.render()
+        else:
+            self.update_scrollbar()
+
+    def update_id(self, item_id):
+        pos = self.position(item_id)
+        if pos is None:
+            return
+        row = pos - self.top
+        if 0 <= row < self.rows:
+            self.listbox.delete(row)
+            self.listbox.insert(row, self.label(item_id))
+            self.show_selection()
+
+    def remove_id(self, item_id):
+        pos = self.position(item_id)
+        if pos is None:
+            return
+        del self.ids[pos]
+        if item_id == self.selected:
+            self.selected = None
+        self.top = min(self.top, self.max_top())
+        if pos < self.top + self.rows:
+            self.render()
+        else:
+            self.update_scrollbar()
+
+    def selected_id(self):
+        return self.selected
+
+    def count(self):
+        return len(self.ids)
+
+    # ================== Drawing ====================
+    def render(self):
+        self.listbox.delete(0, "end")
+        for item_id in self.ids[self.top:self.top + self.rows]:
+            self.listbox.insert("end", self.label(item_id))
+        self.show_selection()
+        self.update_scrollbar()
+
+    def show_selection(self):
+        self.listbox.selection_clear(0, "end")
+        if self.selected is None:
+            return
+        pos = self.position(self.selected)
+        if pos is not None and 0 <= pos - self.top < self.rows:
+            self.listbox.selection_set(pos - self.top)
+
+    # ================== Selection ====================
+    def on_select(self, e):
+        sel = self.listbox.curselection()
+        if sel and self.top + sel[0] < len(self.ids):
+            self.selected = self.ids[self.top + sel[0]]
+
+    def move_selection(self, step):
+        if not self.ids:
+            return "break"
+        pos = None if self.selected is None else self.position(self.selected)
+        if pos is None:
+            pos = self.top
+        else:
+            pos = max(0, min(pos + step, len(self.ids) - 1))
+        self.selected = self.ids[pos]
+        if pos < self.top:
+            self.scroll_to(pos)
+        elif pos >= self.top + self.rows:
+            self.scroll_to(pos - self.rows + 1)
+        self.show_selection()
+        return "break"
+
+# =====================================================
+# Virtual Checklist
+# -----------------------------------------------------
+# A scrollable list of check boxes drawn on one Canvas.
+# Only the visible rows exist as canvas items (a box, a
+# tick and a text each), they are created once and then
+# re-filled while scrolling. The check state is a plain
+# bytearray, one byte per item, not a BooleanVar.
+#
+# Items are keys kept sorted by order(key); label(key)
+# gives the row text. on_toggle(key, checked) is called
+# when the user clicks a row.
+# =====================================================
+class VirtualChecklist(VirtualScroll):
+    def __init__(self, parent, width=220, height=300, row_height=24, label=str, order=None, on_toggle=None):
+        super().__init__(parent, max(1, height // row_height))
+        self.row_height = row_height
+        self.label = label
+        self.order = order or (lambda key: key)
+        self.on_toggle = on_toggle
+        self.keys = []
+        self.order_keys = []
+        self.checked = bytearray()
+
+        self.canvas = tk.Canvas(self, bg=BG_LIGHT, highlightthickness=0, width=width, height=height)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.slots = []
+        for row in range(self.rows):
+            y = row * row_height
+            box = self.canvas.create_rectangle(4, y + 5, 18, y + 19, outline="#7F8C8D", fill="white", state="hidden")
+            tick = self.canvas.create_text(11, y + 12, text="✓", fill="white", font=("Segoe UI", 9, "bold"), state="hidden")
+            text = self.canvas.create_text(26, y + 12, anchor="w", font=("Segoe UI", 10), fill="#2C3E50")
+            self.slots.append((box, tick, text))
+
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.bind_wheel(self.canvas)
+
+    def count(self):
+        return len(self.keys)
+
+    # ================== Model ====================
+    def set_items(self, keys, checked=()):
+        keys = sorted(keys, key=self.order)
+        self.keys = keys
+        self.order_keys = [self.order(k) for k in keys]
+        self.checked = bytearray(len(keys))
+        for key in checked:
+            pos = self.position(key)
+            if pos is not None:
+                self.checked[pos] = 1
+        self.top = min(self.top, self.max_top())
+        self.render()
+
+    def position(self, key):
+        pos = bisect_left(self.order_keys, self.order(key))
+        while pos < len(self.keys) and self.order_keys[pos] == self.order(key):
+            if self.keys[pos] == key:
+                return pos
+            pos += 1
+        return None
+
+    def insert_key(self, key, checked=False):
+        self.change_keys(inserted=[key], checked=[key] if checked else ())
+
+    def remove_key(self, key):
+        self.change_keys(removed=[key])
+
+    def update_key(self, key):
+        self.change_keys(updated=[key])
+
+    # Applies a batch of changes and redraws once, only if a visible row moved or changed
+    def change_keys(self, removed=(), inserted=(), updated=(), checked=()):
+        first = len(self.keys)
+        for key in removed:
+            pos = self.position(key)
+            if pos is not None:
+                del self.keys[pos], self.order_keys[pos], self.checked[pos]
+                first = min(first, pos)
+        for key in inserted:
+            if self.position(key) is not None:
+                continue
+            pos = bisect_left(self.order_keys, self.order(key))
+            self.keys.insert(pos, key)
+            self.order_keys.insert(pos, self.order(key))
+            self.checked.insert(pos, 0)
+            first = min(first, pos)
+        for key in checked:
+            pos = self.position(key)
+            if pos is not None:
+                self.checked[pos] = 1
+        visible = range(self.top, self.top + self.rows)
+        dirty = any(self.position(key) in visible for key in updated)
+
+        self.top = min(self.top, self.max_top())
+        if dirty or first < self.top + self.rows:
+            self.render()
+        else:
+            self.update_scrollbar()
+
+    def is_checked(self, key):
+        pos = self.position(key)
+        return pos is not None and self.checked[pos] == 1
+
+    def set_checked(self, key, value):
+        pos = self.position(key)
+        if pos is not None:
+            self.checked[pos] = 1 if value else 0
+            self.update_key(key)
+
+    # bytearray.find skips unchecked rows in C, not one Python step per row
+    def checked_keys(self):
+        found, pos = [], self.checked.find(1)
+        while pos != -1:
+            found.append(self.keys[pos])
+            pos = self.checked.find(1, pos + 1)
+        return found
+
+    # ================== Drawing ====================
+    def render(self):
+        for row in range(self.rows):
+            self.draw_row(row)
+        self.update_scrollbar()
+
+    def draw_row(self, row):
+        box, tick, text = self.slots[row]
+        pos = self.top + row
+        if pos >= len(self.keys):
+            self.canvas.itemconfigure(box, state="hidden")
+            self.canvas.itemconfigure(tick, state="hidden")
+            self.canvas.itemconfigure(text, text="")
+            return
+        on = self.checked[pos] == 1
+        self.canvas.itemconfigure(box, state="normal", fill=PRIMARY if on else "white")
+        self.canvas.itemconfigure(tick, state="normal" if on else "hidden")
+        self.canvas.itemconfigure(text, text=self.label(self.keys[pos]))
+
+    def on_click(self, e):
+        row = int(e.y // self.row_height)
+        pos = self.top + row
+        if row >= self.rows or pos >= len(self.keys):
+            return
+        self.checked[pos] ^= 1
+        self.draw_row(row)
+        if self.on_toggle:
+            self.on_toggle(self.keys[pos], self.checked[pos] == 1)
+
+# =====================================================
+# Detail Window
+# -----------------------------------------------------
+# The pop-up for a recipe's details and for the shopping
+# list. There is one window per key: it is built the
+# first time, hidden (not destroyed) on Close, and only
+# filled again on the next show(). The lines go into one
+# Text widget with a single insert, so a recipe with 200
+# ingredients costs the same few Tk calls as one with 2.
+#
+#   DetailWindow.get(page, "recipe").show(title, heading, lines)
+# =====================================================
+class DetailWindow(tk.Toplevel):
+    pool = {}   # key -> window
+
+    @classmethod
+    def get(cls, parent, key, geometry="450x400"):
+        win = cls.pool.get(key)
+        if win is None or not win.winfo_exists():
+            win = cls.pool[key] = cls(parent, geometry)
+        return win
+
+    def __init__(self, parent, geometry):
+        super().__init__(parent)
+        self.withdraw()
+        self.geometry(geometry)
+        self.configure(bg=BG_LIGHT)
+        self.protocol("WM_DELETE_WINDOW", self.hide)
+
+        self.heading = tk.Label(self, font=("Segoe UI", 18, "bold"), bg=BG_LIGHT)
+        self.heading.pack(pady=10)
+
+        body = tk.Frame(self, bg=BG_LIGHT)
+        body.pack(fill="both", expand=True, padx=10)
+        self.text = tk.Text(body, width=45, height=10, wrap="word", font=("Segoe UI", 12), bg=BG_LIGHT, relief="flat")
+        scroll = ttk.Scrollbar(body, orient="vertical", command=self.text.yview)
+        self.text.configure(yscrollcommand=scroll.set)
+        self.text.tag_configure("subheading", font=("Segoe UI", 14, "bold"))
+        scroll.pack(side="right", fill="y")
+        self.text.pack(side="left", fill="both", expand=True)
+
+        self.footer = tk.Label(self, font=("Segoe UI", 14, "bold"), bg=BG_LIGHT)
+        self.footer.pack(pady=(10, 0))
+
+        close = tk.Button(self, text="Close", command=self.hide, width=12, bg=PRIMARY, fg="white",
+                          activebackground="#5B6EDC", activeforeground="white", relief="flat",
+                          font=("Segoe UI", 10, "bold"))
+        close.bind("<Enter>", lambda e: close.config(bg="#5B6EDC"))
+        close.bind("<Leave>", lambda e: close.config(bg=PRIMARY))
+        close.pack(pady=12)
+
+    def show(self, title, heading, lines, subheading=None, footer=""):
+        self.title(title)
+        self.heading.config(text=heading)
+        self.footer.config(text=footer)
+
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        if subheading:
+            self.text.insert("end", subheading + "\n", "subheading")
+        self.text.insert("end", "\n".join(lines))
+        self.text.config(state="disabled")
+        self.text.yview_moveto(0)
+
+        self.deiconify()
+        self.lift()
+        self.grab_set()
+        self.focus_set()
+
+    def hide(self):
+        self.grab_release()
+        self.withdraw()